@@ -162,6 +162,19 @@ import os
 TREFLE_API_TOKEN = os.getenv("TREFLE_API_TOKEN")  # if using env
 PERENUAL_API_KEY = os.getenv("PERENUAL_API_KEY", "")
 
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "")
+# LocMemCache is private to each process: web workers and Celery workers do not
+# see each other's entries. Cross-process features (hourly counters, cached
+# unread counts, fetch coalescing, weather sync locks) check this flag and require Redis.
+CACHE_IS_SHARED = bool(CACHE_REDIS_URL)
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_REDIS_URL}
+        if CACHE_REDIS_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    ),
+}
+
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://127.0.0.1:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", CELERY_BROKER_URL)
 CELERY_ACCEPT_CONTENT = ["json"]
@@ -169,16 +182,29 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULE = {
-    "evaluate-smart-reminders-every-15m": {
+    # safety net only: snapshot arrival and plant edits trigger evaluation directly
+    "evaluate-smart-reminders-every-6h": {
         "task": "core.tasks.evaluate_smart_reminders",
-        "schedule": 15 * 60,
+        "schedule": 6 * 60 * 60,
+    },
+    "prefetch-expiring-forecasts-every-10m": {
+        "task": "core.tasks.prefetch_expiring_forecasts",
+        "schedule": 10 * 60,
+    },
+    "prune-weather-snapshots-every-24h": {
+        "task": "core.tasks.prune_weather_snapshots",
+        "schedule": 24 * 60 * 60,
     },
     "dispatch-smart-notifications-every-1m": {
         "task": "core.tasks.dispatch_smart_notifications",
         "schedule": 60,
     },
-    "recompute-all-health-scores-every-6h": {
-        "task": "core.tasks.recompute_all_health_scores",
+    "recompute-dirty-health-scores-every-6h": {
+        "task": "core.tasks.recompute_dirty_health_scores",
+        "schedule": 6 * 60 * 60,
+    },
+    "rollup-plant-health-history-every-6h": {
+        "task": "core.tasks.rollup_plant_health_history",
         "schedule": 6 * 60 * 60,
     },
     "sync-assistant-expert-tips-every-12h": {
@@ -191,6 +217,36 @@ WEATHER_HEATWAVE_THRESHOLD_C = float(os.getenv("WEATHER_HEATWAVE_THRESHOLD_C", "
 WEATHER_FROST_THRESHOLD_C = float(os.getenv("WEATHER_FROST_THRESHOLD_C", "2"))
 WEATHER_RAIN_PROB_SKIP_THRESHOLD = float(os.getenv("WEATHER_RAIN_PROB_SKIP_THRESHOLD", "0.6"))
 WEATHER_RAIN_MM_SKIP_THRESHOLD = float(os.getenv("WEATHER_RAIN_MM_SKIP_THRESHOLD", "2.0"))
+WEATHER_SYNC_LOCK_SECONDS = int(os.getenv("WEATHER_SYNC_LOCK_SECONDS", "600"))
+WEATHER_EVALUATION_CHUNK_SIZE = int(os.getenv("WEATHER_EVALUATION_CHUNK_SIZE", "500"))
+WEATHER_FORECAST_FETCH_WAIT_SECONDS = int(os.getenv("WEATHER_FORECAST_FETCH_WAIT_SECONDS", "10"))
+WEATHER_SNAPSHOT_REUSE_RADIUS_KM = float(os.getenv("WEATHER_SNAPSHOT_REUSE_RADIUS_KM", "2.0"))
+WEATHER_SNAPSHOT_RETENTION_HOURS = int(os.getenv("WEATHER_SNAPSHOT_RETENTION_HOURS", "48"))
+WEATHER_BATCH_MAX_POINTS = int(os.getenv("WEATHER_BATCH_MAX_POINTS", "50"))
+WEATHER_PREFETCH_MARGIN_MINUTES = int(os.getenv("WEATHER_PREFETCH_MARGIN_MINUTES", "60"))
+WEATHER_PREFETCH_SPREAD_SECONDS = int(os.getenv("WEATHER_PREFETCH_SPREAD_SECONDS", "480"))
+WEATHER_PREFETCH_ACTIVE_HOURS = int(os.getenv("WEATHER_PREFETCH_ACTIVE_HOURS", "48"))
+WEATHER_CELL_TOUCH_INTERVAL_SECONDS = int(os.getenv("WEATHER_CELL_TOUCH_INTERVAL_SECONDS", "600"))
+WEATHER_GEOCODE_CACHE_TTL_DAYS = int(os.getenv("WEATHER_GEOCODE_CACHE_TTL_DAYS", "90"))
+WEATHER_GEOCODE_NEGATIVE_TTL_HOURS = int(os.getenv("WEATHER_GEOCODE_NEGATIVE_TTL_HOURS", "24"))
+WEATHER_GEOCODE_MEMORY_SIZE = int(os.getenv("WEATHER_GEOCODE_MEMORY_SIZE", "1024"))
+NOTIFICATIONS_PAGE_SIZE = int(os.getenv("NOTIFICATIONS_PAGE_SIZE", "50"))
+NOTIFICATIONS_MAX_PAGE_SIZE = int(os.getenv("NOTIFICATIONS_MAX_PAGE_SIZE", "200"))
+# "memory" only reaches streams served by the process that created the
+# notification; use "redis" whenever Celery workers create notifications.
+NOTIFICATION_STREAM_REDIS_URL = os.getenv("NOTIFICATION_STREAM_REDIS_URL", CACHE_REDIS_URL)
+NOTIFICATION_STREAM_BACKEND = os.getenv("NOTIFICATION_STREAM_BACKEND", "redis" if NOTIFICATION_STREAM_REDIS_URL else "memory")
+NOTIFICATION_STREAM_HEARTBEAT_SECONDS = int(os.getenv("NOTIFICATION_STREAM_HEARTBEAT_SECONDS", "20"))
+NOTIFICATION_STREAM_QUEUE_SIZE = int(os.getenv("NOTIFICATION_STREAM_QUEUE_SIZE", "100"))
+NOTIFICATION_FANOUT_BATCH_SIZE = int(os.getenv("NOTIFICATION_FANOUT_BATCH_SIZE", "500"))
+SMART_EVENT_DIGEST_WINDOW_SECONDS = int(os.getenv("SMART_EVENT_DIGEST_WINDOW_SECONDS", "120"))
+
+HEALTH_RECOMPUTE_CHUNK_SIZE = int(os.getenv("HEALTH_RECOMPUTE_CHUNK_SIZE", "500"))
+HEALTH_FULL_RECOMPUTE_MAX_AGE_HOURS = float(os.getenv("HEALTH_FULL_RECOMPUTE_MAX_AGE_HOURS", "24"))
+HEALTH_SNAPSHOT_RAW_RETENTION_DAYS = int(os.getenv("HEALTH_SNAPSHOT_RAW_RETENTION_DAYS", "35"))
+HEALTH_HISTORY_RAW_MAX_DAYS = int(os.getenv("HEALTH_HISTORY_RAW_MAX_DAYS", "14"))
+HEALTH_HISTORY_DAILY_MAX_DAYS = int(os.getenv("HEALTH_HISTORY_DAILY_MAX_DAYS", "180"))
+HEALTH_SCORE_CACHE_TTL_SECONDS = int(os.getenv("HEALTH_SCORE_CACHE_TTL_SECONDS", str(6 * 60 * 60)))
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-pro")
@@ -5,6 +5,8 @@ from .models import (
 	CareLog,
 	Reminder,
 	Notification,
+	BroadcastNotification,
+	BroadcastReadCursor,
 	ExpertPost,
 	CommunityPost,
 	CommunityPostLike,
@@ -12,8 +14,12 @@ from .models import (
 	DiseaseProfile,
 	Prediction,
 	WeatherSnapshot,
+	GeocodeCacheEntry,
+	WeatherLocationCell,
 	SmartReminderEvent,
 	PlantHealthSnapshot,
+	PlantHealthDailyRollup,
+	PlantHealthWeeklyRollup,
 	AssistantSession,
 	AssistantMessage,
 	AssistantExpertTip,
@@ -26,6 +32,8 @@ admin.site.register(Profile)
 admin.site.register(CareLog)
 admin.site.register(Reminder)
 admin.site.register(Notification)
+admin.site.register(BroadcastNotification)
+admin.site.register(BroadcastReadCursor)
 admin.site.register(ExpertPost)
 admin.site.register(CommunityPost)
 admin.site.register(CommunityPostLike)
@@ -33,8 +41,12 @@ admin.site.register(ExpertInquiry)
 admin.site.register(DiseaseProfile)
 admin.site.register(Prediction)
 admin.site.register(WeatherSnapshot)
+admin.site.register(GeocodeCacheEntry)
+admin.site.register(WeatherLocationCell)
 admin.site.register(SmartReminderEvent)
 admin.site.register(PlantHealthSnapshot)
+admin.site.register(PlantHealthDailyRollup)
+admin.site.register(PlantHealthWeeklyRollup)
 admin.site.register(AssistantSession)
 admin.site.register(AssistantMessage)
 admin.site.register(AssistantExpertTip)
@@ -2,11 +2,34 @@ from __future__ import annotations
 
 import math
 from dataclasses import dataclass
-from datetime import timedelta
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, Max, Min, OuterRef, Q, Subquery
+from django.db.models.functions import TruncDate, TruncWeek
 from django.utils import timezone
 
-from .models import CareLog, Plant, PlantHealthSnapshot, Prediction, Reminder
+from .models import (
+    CareLog,
+    Plant,
+    PlantHealthDailyRollup,
+    PlantHealthSnapshot,
+    PlantHealthWeeklyRollup,
+    Prediction,
+    Reminder,
+)
+from .serializers import PlantHealthSnapshotSerializer
+
+
+SEVERITY_MAP = {
+    "low": 0.2,
+    "medium": 0.5,
+    "high": 0.8,
+    "critical": 1.0,
+}
 
 
 @dataclass
@@ -23,88 +46,303 @@ class HealthDataAggregator:
     def _clamp(value: float, min_value: float = 0.0, max_value: float = 1.0) -> float:
         return max(min_value, min(max_value, value))
 
-    @classmethod
-    def watering_subscore(cls, plant: Plant, window_days: int) -> float:
-        since = timezone.now() - timedelta(days=window_days)
-        expected_interval = max(1, int(plant.dynamic_watering_interval or plant.watering_interval or 3))
-        expected = max(1.0, window_days / expected_interval)
-        actual = float(
-            CareLog.objects.filter(
-                user=plant.user,
-                plant=plant,
-                date__gte=since,
-                action__icontains="water",
-            ).count()
-        )
-        return cls._clamp(1.0 - abs(actual - expected) / (expected + 1e-6))
+    # -- pure scoring math, shared by the per-plant and bulk paths --
 
     @classmethod
-    def fertilizing_subscore(cls, plant: Plant, window_days: int) -> float:
-        since = timezone.now() - timedelta(days=window_days)
-        expected = max(1.0, window_days / 30.0)
-        actual = float(
-            CareLog.objects.filter(
-                user=plant.user,
-                plant=plant,
-                date__gte=since,
-                action__icontains="fertiliz",
-            ).count()
-        )
+    def _expected_ratio_score(cls, actual: float, expected: float) -> float:
         return cls._clamp(1.0 - abs(actual - expected) / (expected + 1e-6))
 
     @classmethod
-    def disease_subscore(cls, plant: Plant, window_days: int) -> float:
-        since = timezone.now() - timedelta(days=window_days)
-        predictions = Prediction.objects.filter(user=plant.user, plant=plant, status="done", created_at__gte=since)
+    def score_watering(cls, plant: Plant, actual: int, window_days: int) -> float:
+        expected_interval = max(1, int(plant.dynamic_watering_interval or plant.watering_interval or 3))
+        expected = max(1.0, window_days / expected_interval)
+        return cls._expected_ratio_score(float(actual), expected)
 
-        severity_map = {
-            "low": 0.2,
-            "medium": 0.5,
-            "high": 0.8,
-            "critical": 1.0,
-        }
+    @classmethod
+    def score_fertilizing(cls, actual: int, window_days: int) -> float:
+        expected = max(1.0, window_days / 30.0)
+        return cls._expected_ratio_score(float(actual), expected)
 
+    @staticmethod
+    def disease_penalty(rows: Iterable[Tuple[datetime, str]], now: datetime) -> float:
         penalty = 0.0
-        now = timezone.now()
-        for prediction in predictions:
-            urgency = (prediction.urgency_level or "low").lower()
-            severity = severity_map.get(urgency, 0.2)
-            days_old = max(0.0, (now - prediction.created_at).total_seconds() / 86400.0)
+        for created_at, urgency_level in rows:
+            urgency = (urgency_level or "low").lower()
+            severity = SEVERITY_MAP.get(urgency, 0.2)
+            days_old = max(0.0, (now - created_at).total_seconds() / 86400.0)
             penalty += severity * math.exp(-days_old / 14.0)
+        return penalty
 
+    @classmethod
+    def score_disease(cls, penalty: float) -> float:
         return cls._clamp(1.0 - min(1.0, penalty))
 
     @classmethod
-    def growth_subscore(cls, plant: Plant, window_days: int) -> float:
-        since = timezone.now() - timedelta(days=window_days)
-        predictions = Prediction.objects.filter(user=plant.user, plant=plant, status="done", created_at__gte=since)
-
-        total = predictions.count()
+    def score_growth(cls, plant: Plant, total: int, healthy_count: int) -> float:
         if total == 0:
             return 0.6 if plant.image or plant.image_url else 0.5
-
-        healthy_count = predictions.filter(disease__code="healthy").count()
         healthy_ratio = healthy_count / total
         return cls._clamp(0.3 + 0.7 * healthy_ratio)
 
     @classmethod
-    def missed_subscore(cls, plant: Plant, window_days: int) -> float:
-        reminders = Reminder.objects.filter(user=plant.user, plant=plant)
-        if not reminders.exists():
+    def score_missed(cls, reminders: Sequence[Tuple[int, datetime]], window_days: int, now: datetime) -> float:
+        if not reminders:
             return 1.0
 
-        now = timezone.now()
         scheduled = 0.0
         missed = 0.0
-
-        for reminder in reminders:
-            freq = max(1, int(reminder.frequency_days or 1))
+        for frequency_days, next_run in reminders:
+            freq = max(1, int(frequency_days or 1))
             scheduled += max(1.0, window_days / freq)
-            if reminder.next_run < now - timedelta(days=1):
+            if next_run < now - timedelta(days=1):
                 missed += 1.0
 
         return cls._clamp(1.0 - min(1.0, missed / (scheduled + 1e-6)))
 
+    # -- per-plant queries --
+
+    @classmethod
+    def watering_subscore(cls, plant: Plant, window_days: int, now: Optional[datetime] = None) -> float:
+        since = (now or timezone.now()) - timedelta(days=window_days)
+        actual = CareLog.objects.filter(
+            user=plant.user,
+            plant=plant,
+            date__gte=since,
+            action__icontains="water",
+        ).count()
+        return cls.score_watering(plant, actual, window_days)
+
+    @classmethod
+    def fertilizing_subscore(cls, plant: Plant, window_days: int, now: Optional[datetime] = None) -> float:
+        since = (now or timezone.now()) - timedelta(days=window_days)
+        actual = CareLog.objects.filter(
+            user=plant.user,
+            plant=plant,
+            date__gte=since,
+            action__icontains="fertiliz",
+        ).count()
+        return cls.score_fertilizing(actual, window_days)
+
+    @classmethod
+    def disease_subscore(cls, plant: Plant, window_days: int, now: Optional[datetime] = None) -> float:
+        now = now or timezone.now()
+        since = now - timedelta(days=window_days)
+        rows = (
+            Prediction.objects.filter(user=plant.user, plant=plant, status="done", created_at__gte=since)
+            .order_by("-created_at")
+            .values_list("created_at", "urgency_level")
+        )
+        return cls.score_disease(cls.disease_penalty(rows, now))
+
+    @classmethod
+    def growth_subscore(cls, plant: Plant, window_days: int, now: Optional[datetime] = None) -> float:
+        since = (now or timezone.now()) - timedelta(days=window_days)
+        predictions = Prediction.objects.filter(user=plant.user, plant=plant, status="done", created_at__gte=since)
+
+        total = predictions.count()
+        healthy_count = predictions.filter(disease__code="healthy").count() if total else 0
+        return cls.score_growth(plant, total, healthy_count)
+
+    @classmethod
+    def missed_subscore(cls, plant: Plant, window_days: int, now: Optional[datetime] = None) -> float:
+        reminders = list(
+            Reminder.objects.filter(user=plant.user, plant=plant)
+            .order_by("id")
+            .values_list("frequency_days", "next_run")
+        )
+        return cls.score_missed(reminders, window_days, now or timezone.now())
+
+    # -- one fetch per input, bucketed by window in memory --
+
+    @staticmethod
+    def _window_prefix(rows: Sequence[Tuple], since: datetime) -> Sequence[Tuple]:
+        # rows are ordered newest first, so the rows inside a window form a prefix
+        count = 0
+        for row in rows:
+            if row[0] < since:
+                break
+            count += 1
+        return rows[:count]
+
+    @classmethod
+    def subscores_for_windows(cls, plant: Plant, windows: Sequence[int], now: datetime) -> Dict[int, HealthScoreComponents]:
+        since = now - timedelta(days=max(windows))
+        care_rows = list(
+            CareLog.objects.filter(user=plant.user, plant=plant, date__gte=since)
+            .order_by("-date")
+            .values_list("date", "action")
+        )
+        prediction_rows = list(
+            Prediction.objects.filter(user=plant.user, plant=plant, status="done", created_at__gte=since)
+            .order_by("-created_at")
+            .values_list("created_at", "urgency_level", "disease__code")
+        )
+        reminders = list(
+            Reminder.objects.filter(user=plant.user, plant=plant)
+            .order_by("id")
+            .values_list("frequency_days", "next_run")
+        )
+
+        result: Dict[int, HealthScoreComponents] = {}
+        for window_days in windows:
+            window_since = now - timedelta(days=window_days)
+            care = cls._window_prefix(care_rows, window_since)
+            predictions = cls._window_prefix(prediction_rows, window_since)
+            watering_count = sum(1 for _, action in care if "water" in (action or "").lower())
+            fertilizing_count = sum(1 for _, action in care if "fertiliz" in (action or "").lower())
+            healthy_count = sum(1 for _, _, code in predictions if code == "healthy")
+            penalty = cls.disease_penalty(((created_at, urgency) for created_at, urgency, _ in predictions), now)
+            result[window_days] = HealthScoreComponents(
+                watering=cls.score_watering(plant, watering_count, window_days),
+                fertilizing=cls.score_fertilizing(fertilizing_count, window_days),
+                disease=cls.score_disease(penalty),
+                growth=cls.score_growth(plant, len(predictions), healthy_count),
+                missed=cls.score_missed(reminders, window_days, now),
+            )
+        return result
+
+    # -- grouped queries for a chunk of plants, keyed by plant_id --
+
+    @staticmethod
+    def care_counts_bulk(plant_ids: Sequence[int], windows: Dict[int, datetime]) -> Dict[int, Dict[int, Tuple[int, int]]]:
+        annotations = {}
+        for window_days, since in windows.items():
+            annotations[f"watering_{window_days}"] = Count("id", filter=Q(action__icontains="water", date__gte=since))
+            annotations[f"fertilizing_{window_days}"] = Count("id", filter=Q(action__icontains="fertiliz", date__gte=since))
+
+        rows = (
+            CareLog.objects.filter(plant_id__in=plant_ids, user_id=F("plant__user_id"), date__gte=min(windows.values()))
+            .values("plant_id")
+            .annotate(**annotations)
+            .order_by()
+        )
+        return {
+            row["plant_id"]: {
+                window_days: (row[f"watering_{window_days}"], row[f"fertilizing_{window_days}"])
+                for window_days in windows
+            }
+            for row in rows
+        }
+
+    @staticmethod
+    def prediction_counts_bulk(plant_ids: Sequence[int], windows: Dict[int, datetime]) -> Dict[int, Dict[int, Tuple[int, int]]]:
+        annotations = {}
+        for window_days, since in windows.items():
+            annotations[f"total_{window_days}"] = Count("id", filter=Q(created_at__gte=since))
+            annotations[f"healthy_{window_days}"] = Count("id", filter=Q(created_at__gte=since, disease__code="healthy"))
+
+        rows = (
+            Prediction.objects.filter(
+                plant_id__in=plant_ids,
+                user_id=F("plant__user_id"),
+                status="done",
+                created_at__gte=min(windows.values()),
+            )
+            .values("plant_id")
+            .annotate(**annotations)
+            .order_by()
+        )
+        return {
+            row["plant_id"]: {
+                window_days: (row[f"total_{window_days}"], row[f"healthy_{window_days}"])
+                for window_days in windows
+            }
+            for row in rows
+        }
+
+    # -- columnar math over values_list arrays, used by the bulk path --
+
+    @staticmethod
+    def disease_penalties_from_columns(
+        plant_ids: np.ndarray,
+        ages_days: np.ndarray,
+        severities: np.ndarray,
+        windows: Sequence[int],
+    ) -> Dict[int, Dict[int, float]]:
+        if plant_ids.size == 0:
+            return {}
+
+        unique_ids, inverse = np.unique(plant_ids, return_inverse=True)
+        weights = severities * np.exp(-np.maximum(0.0, ages_days) / 14.0)
+        per_window = {
+            window_days: np.bincount(inverse, weights=np.where(ages_days <= window_days, weights, 0.0), minlength=unique_ids.size)
+            for window_days in windows
+        }
+        columns = [per_window[window_days].tolist() for window_days in windows]
+        return {
+            plant_id: dict(zip(windows, values))
+            for plant_id, values in zip(unique_ids.tolist(), zip(*columns))
+        }
+
+    @classmethod
+    def missed_subscores_from_columns(
+        cls,
+        plant_ids: np.ndarray,
+        frequency_days: np.ndarray,
+        overdue: np.ndarray,
+        windows: Sequence[int],
+    ) -> Dict[int, Dict[int, float]]:
+        if plant_ids.size == 0:
+            return {}
+
+        unique_ids, inverse = np.unique(plant_ids, return_inverse=True)
+        freq = np.maximum(1, frequency_days)
+        missed = np.bincount(inverse, weights=overdue.astype(np.float64), minlength=unique_ids.size)
+        columns = []
+        for window_days in windows:
+            scheduled = np.bincount(inverse, weights=np.maximum(1.0, window_days / freq), minlength=unique_ids.size)
+            columns.append(np.clip(1.0 - np.minimum(1.0, missed / (scheduled + 1e-6)), 0.0, 1.0).tolist())
+        return {
+            plant_id: dict(zip(windows, values))
+            for plant_id, values in zip(unique_ids.tolist(), zip(*columns))
+        }
+
+    @classmethod
+    def disease_penalties_bulk(cls, plant_ids: Sequence[int], windows: Dict[int, datetime], now: datetime) -> Dict[int, Dict[int, float]]:
+        rows = (
+            Prediction.objects.filter(
+                plant_id__in=plant_ids,
+                user_id=F("plant__user_id"),
+                status="done",
+                created_at__gte=min(windows.values()),
+            )
+            .order_by("plant_id", "-created_at")
+            .values_list("plant_id", "created_at", "urgency_level")
+        )
+        ids, ages, severities = [], [], []
+        for plant_id, created_at, urgency_level in rows:
+            ids.append(plant_id)
+            ages.append((now - created_at).total_seconds() / 86400.0)
+            severities.append(SEVERITY_MAP.get((urgency_level or "low").lower(), 0.2))
+
+        return cls.disease_penalties_from_columns(
+            np.asarray(ids, dtype=np.int64),
+            np.asarray(ages, dtype=np.float64),
+            np.asarray(severities, dtype=np.float64),
+            list(windows),
+        )
+
+    @classmethod
+    def missed_subscores_bulk(cls, plant_ids: Sequence[int], windows: Sequence[int], now: datetime) -> Dict[int, Dict[int, float]]:
+        rows = (
+            Reminder.objects.filter(plant_id__in=plant_ids, user_id=F("plant__user_id"))
+            .order_by("plant_id", "id")
+            .values_list("plant_id", "frequency_days", "next_run")
+        )
+        overdue_before = now - timedelta(days=1)
+        ids, frequencies, overdue = [], [], []
+        for plant_id, frequency_days, next_run in rows:
+            ids.append(plant_id)
+            frequencies.append(int(frequency_days or 1))
+            overdue.append(next_run < overdue_before)
+
+        return cls.missed_subscores_from_columns(
+            np.asarray(ids, dtype=np.int64),
+            np.asarray(frequencies, dtype=np.int64),
+            np.asarray(overdue, dtype=bool),
+            windows,
+        )
+
 
 class HealthScoringEngine:
     VERSION = "health_v1"
@@ -117,13 +355,69 @@ class HealthScoringEngine:
     }
 
     @classmethod
-    def compute_components(cls, plant: Plant, window_days: int = 30) -> HealthScoreComponents:
+    def compute_components(cls, plant: Plant, window_days: int = 30, now: Optional[datetime] = None) -> HealthScoreComponents:
+        now = now or timezone.now()
         return HealthScoreComponents(
-            watering=HealthDataAggregator.watering_subscore(plant, window_days),
-            fertilizing=HealthDataAggregator.fertilizing_subscore(plant, window_days),
-            disease=HealthDataAggregator.disease_subscore(plant, window_days),
-            growth=HealthDataAggregator.growth_subscore(plant, window_days),
-            missed=HealthDataAggregator.missed_subscore(plant, window_days),
+            watering=HealthDataAggregator.watering_subscore(plant, window_days, now),
+            fertilizing=HealthDataAggregator.fertilizing_subscore(plant, window_days, now),
+            disease=HealthDataAggregator.disease_subscore(plant, window_days, now),
+            growth=HealthDataAggregator.growth_subscore(plant, window_days, now),
+            missed=HealthDataAggregator.missed_subscore(plant, window_days, now),
+        )
+
+    @classmethod
+    def compute_components_multi(
+        cls,
+        plant: Plant,
+        windows: Sequence[int],
+        now: Optional[datetime] = None,
+    ) -> Dict[int, HealthScoreComponents]:
+        return HealthDataAggregator.subscores_for_windows(plant, windows, now or timezone.now())
+
+    @classmethod
+    def compute_components_bulk_multi(
+        cls,
+        plants: Sequence[Plant],
+        windows: Sequence[int],
+        now: Optional[datetime] = None,
+    ) -> Dict[int, Dict[int, HealthScoreComponents]]:
+        if not plants:
+            return {}
+
+        now = now or timezone.now()
+        since_by_window = {window_days: now - timedelta(days=window_days) for window_days in windows}
+        plant_ids = [plant.id for plant in plants]
+
+        care_counts = HealthDataAggregator.care_counts_bulk(plant_ids, since_by_window)
+        prediction_counts = HealthDataAggregator.prediction_counts_bulk(plant_ids, since_by_window)
+        penalties = HealthDataAggregator.disease_penalties_bulk(plant_ids, since_by_window, now)
+        missed = HealthDataAggregator.missed_subscores_bulk(plant_ids, windows, now)
+
+        result: Dict[int, Dict[int, HealthScoreComponents]] = {}
+        for plant in plants:
+            result[plant.id] = {}
+            for window_days in windows:
+                watering_count, fertilizing_count = care_counts.get(plant.id, {}).get(window_days, (0, 0))
+                total, healthy_count = prediction_counts.get(plant.id, {}).get(window_days, (0, 0))
+                penalty = penalties.get(plant.id, {}).get(window_days, 0.0)
+                result[plant.id][window_days] = HealthScoreComponents(
+                    watering=HealthDataAggregator.score_watering(plant, watering_count, window_days),
+                    fertilizing=HealthDataAggregator.score_fertilizing(fertilizing_count, window_days),
+                    disease=HealthDataAggregator.score_disease(penalty),
+                    growth=HealthDataAggregator.score_growth(plant, total, healthy_count),
+                    missed=missed.get(plant.id, {}).get(window_days, 1.0),
+                )
+        return result
+
+    @classmethod
+    def provisional_components(cls, plant: Plant) -> HealthScoreComponents:
+        # neutral stand-in served while the real score is computed in the background
+        return HealthScoreComponents(
+            watering=0.5,
+            fertilizing=0.5,
+            disease=1.0,
+            growth=HealthDataAggregator.score_growth(plant, 0, 0),
+            missed=1.0,
         )
 
     @classmethod
@@ -138,8 +432,7 @@ class HealthScoringEngine:
         return int(round(max(0.0, min(100.0, raw))))
 
 
-def compute_and_store_plant_health(plant: Plant, window_days: int = 30) -> PlantHealthSnapshot:
-    components = HealthScoringEngine.compute_components(plant, window_days=window_days)
+def build_health_snapshot(plant: Plant, components: HealthScoreComponents, window_days: int = 30) -> PlantHealthSnapshot:
     score = HealthScoringEngine.compute_score(components)
 
     explanation = {
@@ -153,9 +446,9 @@ def compute_and_store_plant_health(plant: Plant, window_days: int = 30) -> Plant
         },
     }
 
-    snapshot = PlantHealthSnapshot.objects.create(
+    return PlantHealthSnapshot(
         plant=plant,
-        user=plant.user,
+        user_id=plant.user_id,
         score=score,
         window_days=window_days,
         watering_subscore=components.watering,
@@ -166,4 +459,305 @@ def compute_and_store_plant_health(plant: Plant, window_days: int = 30) -> Plant
         version=HealthScoringEngine.VERSION,
         explanation_json=explanation,
     )
+
+
+SUBSCORE_FIELDS = (
+    "watering_subscore",
+    "fertilizing_subscore",
+    "disease_subscore",
+    "growth_subscore",
+    "missed_subscore",
+)
+
+
+def is_same_health_snapshot(snapshot: PlantHealthSnapshot, previous: Optional[PlantHealthSnapshot]) -> bool:
+    if previous is None or previous.version != snapshot.version or previous.score != snapshot.score:
+        return False
+    return all(round(getattr(snapshot, field), 4) == round(getattr(previous, field), 4) for field in SUBSCORE_FIELDS)
+
+
+def latest_health_snapshots(plant_ids: Sequence[int], window_days: int = 30) -> Dict[int, PlantHealthSnapshot]:
+    latest_ids = (
+        Plant.objects.filter(id__in=plant_ids)
+        .annotate(
+            latest_snapshot_id=Subquery(
+                PlantHealthSnapshot.objects.filter(plant=OuterRef("pk"), window_days=window_days)
+                .order_by("-created_at")
+                .values("id")[:1]
+            )
+        )
+        .exclude(latest_snapshot_id=None)
+        .values_list("id", "latest_snapshot_id")
+    )
+    snapshot_ids = dict(latest_ids)
+    snapshots = PlantHealthSnapshot.objects.in_bulk(list(snapshot_ids.values()))
+    return {plant_id: snapshots[snapshot_id] for plant_id, snapshot_id in snapshot_ids.items() if snapshot_id in snapshots}
+
+
+def compute_and_store_plant_health(plant: Plant, window_days: int = 30) -> PlantHealthSnapshot:
+    now = timezone.now()
+    components = HealthScoringEngine.compute_components(plant, window_days=window_days, now=now)
+    snapshot = build_health_snapshot(plant, components, window_days)
+
+    previous = (
+        PlantHealthSnapshot.objects.filter(plant=plant, window_days=window_days)
+        .order_by("-created_at")
+        .first()
+    )
+    if is_same_health_snapshot(snapshot, previous):
+        snapshot = previous
+    else:
+        snapshot.save()
+
+    Plant.objects.filter(id=plant.id).update(health_computed_at=now)
+    cache_health_snapshots([snapshot])
     return snapshot
+
+
+def store_health_snapshots_bulk(snapshots: Sequence[PlantHealthSnapshot], window_days: int = 30) -> List[PlantHealthSnapshot]:
+    previous = latest_health_snapshots([snapshot.plant_id for snapshot in snapshots], window_days)
+    changed = [snapshot for snapshot in snapshots if not is_same_health_snapshot(snapshot, previous.get(snapshot.plant_id))]
+    created = PlantHealthSnapshot.objects.bulk_create(changed)
+    cache_health_snapshots(created)
+    return created
+
+
+def compute_and_store_plant_health_bulk(
+    plants: Sequence[Plant],
+    window_days: int = 30,
+    windows: Optional[Sequence[int]] = None,
+) -> List[PlantHealthSnapshot]:
+    if not plants:
+        return []
+
+    now = timezone.now()
+    windows = list(windows or [window_days])
+    components_by_plant = HealthScoringEngine.compute_components_bulk_multi(plants, windows, now=now)
+
+    created: List[PlantHealthSnapshot] = []
+    for window in windows:
+        snapshots = [build_health_snapshot(plant, components_by_plant[plant.id][window], window) for plant in plants]
+        created.extend(store_health_snapshots_bulk(snapshots, window))
+
+    Plant.objects.filter(id__in=[plant.id for plant in plants]).update(health_computed_at=now)
+    return created
+
+
+# -- dirty-set tracking --
+
+def mark_plants_health_dirty(plant_ids: Iterable[Optional[int]]) -> None:
+    plant_ids = {plant_id for plant_id in plant_ids if plant_id is not None}
+    if plant_ids:
+        Plant.objects.filter(id__in=plant_ids).update(health_inputs_changed_at=timezone.now())
+        invalidate_health_score_cache(plant_ids)
+
+
+def is_health_dirty(plant: Plant, now: Optional[datetime] = None) -> bool:
+    if plant.health_computed_at is None:
+        return True
+    if plant.health_inputs_changed_at is not None and plant.health_inputs_changed_at >= plant.health_computed_at:
+        return True
+    max_age_hours = getattr(settings, "HEALTH_FULL_RECOMPUTE_MAX_AGE_HOURS", 24)
+    return plant.health_computed_at < (now or timezone.now()) - timedelta(hours=max_age_hours)
+
+
+def refresh_plant_health_decay_bulk(plants: Sequence[Plant], window_days: int = 30) -> Tuple[List[PlantHealthSnapshot], List[Plant]]:
+    """Re-apply the time-dependent disease decay on top of each plant's latest snapshot.
+
+    Returns the snapshots written and the plants that had no snapshot to refresh
+    from (these need a full recompute).
+    """
+    if not plants:
+        return [], []
+
+    now = timezone.now()
+    plant_ids = [plant.id for plant in plants]
+    previous = latest_health_snapshots(plant_ids, window_days)
+    penalties = HealthDataAggregator.disease_penalties_bulk(plant_ids, {window_days: now - timedelta(days=window_days)}, now)
+
+    refreshed: List[PlantHealthSnapshot] = []
+    missing: List[Plant] = []
+    for plant in plants:
+        last = previous.get(plant.id)
+        if last is None:
+            missing.append(plant)
+            continue
+
+        components = HealthScoreComponents(
+            watering=last.watering_subscore,
+            fertilizing=last.fertilizing_subscore,
+            disease=HealthDataAggregator.score_disease(penalties.get(plant.id, {}).get(window_days, 0.0)),
+            growth=last.growth_subscore,
+            missed=last.missed_subscore,
+        )
+        snapshot = build_health_snapshot(plant, components, window_days)
+        if not is_same_health_snapshot(snapshot, last):
+            refreshed.append(snapshot)
+
+    created = PlantHealthSnapshot.objects.bulk_create(refreshed)
+    cache_health_snapshots(created)
+    return created, missing
+
+
+# -- read-through cache for the latest default-window score --
+
+DEFAULT_WINDOW_DAYS = 30
+
+
+def health_score_cache_key(plant_id: int) -> str:
+    return f"plant_health_score:{plant_id}"
+
+
+def health_recompute_pending_key(plant_id: int) -> str:
+    return f"plant_health_recompute_pending:{plant_id}"
+
+
+def cache_health_snapshots(snapshots: Iterable[PlantHealthSnapshot]) -> None:
+    payload = {
+        health_score_cache_key(snapshot.plant_id): dict(PlantHealthSnapshotSerializer(snapshot).data)
+        for snapshot in snapshots
+        if snapshot.window_days == DEFAULT_WINDOW_DAYS
+    }
+    if payload:
+        cache.set_many(payload, timeout=getattr(settings, "HEALTH_SCORE_CACHE_TTL_SECONDS", 6 * 60 * 60))
+
+
+def invalidate_health_score_cache(plant_ids: Iterable[int]) -> None:
+    cache.delete_many([health_score_cache_key(plant_id) for plant_id in plant_ids])
+
+
+def get_cached_health_score(plant_id: int) -> Optional[dict]:
+    return cache.get(health_score_cache_key(plant_id))
+
+
+def provisional_health_score(plant: Plant, stale_snapshot: Optional[PlantHealthSnapshot] = None) -> dict:
+    if stale_snapshot is not None:
+        data = dict(PlantHealthSnapshotSerializer(stale_snapshot).data)
+    else:
+        components = HealthScoringEngine.provisional_components(plant)
+        data = dict(PlantHealthSnapshotSerializer(build_health_snapshot(plant, components, DEFAULT_WINDOW_DAYS)).data)
+    data["provisional"] = True
+    return data
+
+
+# -- history rollups --
+
+HEALTH_ROLLUP_TIERS = {
+    "daily": (PlantHealthDailyRollup, TruncDate),
+    "weekly": (PlantHealthWeeklyRollup, TruncWeek),
+}
+
+
+def health_rollup_watermark(tier: str) -> Optional[datetime]:
+    """Start of the newest bucket already rolled up for ``tier``, or None before the first run.
+
+    The rollup table itself is the persisted watermark: every bucket before it
+    was rolled after it had closed, so only the watermark bucket onward needs
+    rolling again.
+    """
+    model, _ = HEALTH_ROLLUP_TIERS[tier]
+    latest = model.objects.aggregate(latest=Max("bucket_start"))["latest"]
+    if latest is None:
+        return None
+    return timezone.make_aware(datetime.combine(latest, datetime.min.time()))
+
+
+def _health_rollup_rows(snapshots, trunc):
+    return (
+        snapshots.annotate(bucket=trunc("created_at"))
+        .values("plant_id", "user_id", "window_days", "bucket")
+        .annotate(
+            sample_count=Count("id"),
+            score_avg=Avg("score"),
+            score_min=Min("score"),
+            score_max=Max("score"),
+            **{field: Avg(field) for field in SUBSCORE_FIELDS},
+        )
+        .order_by()
+    )
+
+
+def _health_rollup_from_row(model, row: Dict[str, Any]):
+    bucket = row.pop("bucket")
+    return model(bucket_start=bucket.date() if isinstance(bucket, datetime) else bucket, **row)
+
+
+def rollup_health_snapshots(tier: str, since: Optional[datetime] = None, batch_size: int = 500) -> int:
+    """Upsert ``tier`` rollups for every bucket from ``since`` (default: the watermark) onward.
+
+    With no watermark yet, every stored snapshot is rolled up, which backfills
+    history recorded before the rollup tables existed.
+    """
+    model, trunc = HEALTH_ROLLUP_TIERS[tier]
+    if since is None:
+        since = health_rollup_watermark(tier)
+
+    snapshots = PlantHealthSnapshot.objects.all()
+    if since is not None:
+        snapshots = snapshots.filter(created_at__gte=since)
+    rows = _health_rollup_rows(snapshots, trunc)
+
+    def flush(batch: List) -> None:
+        model.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=["plant", "window_days", "bucket_start"],
+            update_fields=["sample_count", "score_avg", "score_min", "score_max", *SUBSCORE_FIELDS, "updated_at"],
+        )
+
+    written = 0
+    batch = []
+    for row in rows.iterator(chunk_size=batch_size):
+        batch.append(_health_rollup_from_row(model, row))
+        if len(batch) >= batch_size:
+            flush(batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        flush(batch)
+        written += len(batch)
+    return written
+
+
+def health_rollup_history(tier: str, plant: Plant, window_days: int, bucket_since: date) -> List:
+    """One plant's ``tier`` series from ``bucket_since``, current up to the latest snapshot.
+
+    Buckets before the watermark come from the rollup table. The watermark bucket
+    and anything newer may still be open or not rolled up yet, so they are
+    aggregated from raw snapshots on read; those are never pruned.
+    """
+    model, trunc = HEALTH_ROLLUP_TIERS[tier]
+    watermark = health_rollup_watermark(tier)
+    open_since = timezone.make_aware(datetime.combine(bucket_since, datetime.min.time()))
+    closed = model.objects.filter(plant=plant, window_days=window_days, bucket_start__gte=bucket_since)
+    if watermark is not None:
+        closed = closed.filter(bucket_start__lt=timezone.localdate(watermark))
+        open_since = max(open_since, watermark)
+
+    snapshots = PlantHealthSnapshot.objects.filter(plant=plant, window_days=window_days, created_at__gte=open_since)
+    recent = [_health_rollup_from_row(model, row) for row in _health_rollup_rows(snapshots, trunc)]
+    return list(closed) + sorted(recent, key=lambda rollup: rollup.bucket_start)
+
+
+def prune_rolled_up_health_snapshots(retention_days: int) -> int:
+    """Delete raw snapshots past retention whose daily and weekly buckets are both closed and rolled up."""
+    watermarks = [health_rollup_watermark(tier) for tier in HEALTH_ROLLUP_TIERS]
+    if any(watermark is None for watermark in watermarks):
+        return 0
+    cutoff = min(timezone.now() - timedelta(days=retention_days), *watermarks)
+
+    latest_ids = (
+        PlantHealthSnapshot.objects.values("plant_id", "window_days")
+        .annotate(latest_id=Max("id"))
+        .values("latest_id")
+    )
+    deleted, _ = PlantHealthSnapshot.objects.filter(created_at__lt=cutoff).exclude(id__in=latest_ids).delete()
+    return deleted
+
+
+def health_history_tier(days: int) -> str:
+    if days <= getattr(settings, "HEALTH_HISTORY_RAW_MAX_DAYS", 14):
+        return "raw"
+    if days <= getattr(settings, "HEALTH_HISTORY_DAILY_MAX_DAYS", 180):
+        return "daily"
+    return "weekly"
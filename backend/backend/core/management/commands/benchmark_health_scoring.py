@@ -0,0 +1,103 @@
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.health_scoring import SEVERITY_MAP, HealthDataAggregator
+
+
+class Command(BaseCommand):
+    help = "Compare the row-by-row and NumPy columnar disease/missed math used by the health batch job."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000])
+        parser.add_argument("--predictions-per-plant", type=int, default=10)
+        parser.add_argument("--window-days", type=int, default=30)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        window_days = options["window_days"]
+        now = timezone.now()
+
+        for size in options["sizes"]:
+            plant_count = max(1, size // options["predictions_per_plant"])
+            predictions = sorted(
+                (
+                    rng.randint(1, plant_count),
+                    now - timedelta(days=rng.uniform(0, window_days)),
+                    rng.choice(["low", "medium", "high", "critical", ""]),
+                )
+                for _ in range(size)
+            )
+            reminders = sorted(
+                (plant_id, rng.randint(1, 14), now + timedelta(days=rng.uniform(-5, 5)))
+                for plant_id in range(1, plant_count + 1)
+                for _ in range(rng.randint(0, 3))
+            )
+
+            row_seconds, row_result = self._best_of(options["repeat"], lambda: self._row_path(predictions, reminders, window_days, now))
+            columnar_seconds, columnar_result = self._best_of(
+                options["repeat"], lambda: self._columnar_path(predictions, reminders, window_days, now)
+            )
+
+            max_diff = max(
+                (abs(row_result[key] - columnar_result.get(key, 0.0)) for key in row_result),
+                default=0.0,
+            )
+            self.stdout.write(
+                f"predictions={size} reminders={len(reminders)} plants={plant_count} "
+                f"row={row_seconds * 1000:.1f}ms columnar={columnar_seconds * 1000:.1f}ms "
+                f"speedup={row_seconds / max(columnar_seconds, 1e-9):.1f}x max_abs_diff={max_diff:.2e}"
+            )
+
+    @staticmethod
+    def _best_of(repeat, func):
+        best, result = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    @staticmethod
+    def _row_path(predictions, reminders, window_days, now):
+        grouped_predictions = defaultdict(list)
+        for plant_id, created_at, urgency_level in predictions:
+            grouped_predictions[plant_id].append((created_at, urgency_level))
+        grouped_reminders = defaultdict(list)
+        for plant_id, frequency_days, next_run in reminders:
+            grouped_reminders[plant_id].append((frequency_days, next_run))
+
+        result = {}
+        for plant_id, rows in grouped_predictions.items():
+            result[("disease", plant_id)] = HealthDataAggregator.disease_penalty(rows, now)
+        for plant_id, rows in grouped_reminders.items():
+            result[("missed", plant_id)] = HealthDataAggregator.score_missed(rows, window_days, now)
+        return result
+
+    @staticmethod
+    def _columnar_path(predictions, reminders, window_days, now):
+        penalties = HealthDataAggregator.disease_penalties_from_columns(
+            np.asarray([row[0] for row in predictions], dtype=np.int64),
+            np.asarray([(now - row[1]).total_seconds() / 86400.0 for row in predictions], dtype=np.float64),
+            np.asarray([SEVERITY_MAP.get((row[2] or "low").lower(), 0.2) for row in predictions], dtype=np.float64),
+            [window_days],
+        )
+        overdue_before = now - timedelta(days=1)
+        missed = HealthDataAggregator.missed_subscores_from_columns(
+            np.asarray([row[0] for row in reminders], dtype=np.int64),
+            np.asarray([row[1] for row in reminders], dtype=np.int64),
+            np.asarray([row[2] < overdue_before for row in reminders], dtype=bool),
+            [window_days],
+        )
+
+        result = {("disease", plant_id): by_window[window_days] for plant_id, by_window in penalties.items()}
+        result.update({("missed", plant_id): by_window[window_days] for plant_id, by_window in missed.items()})
+        return result
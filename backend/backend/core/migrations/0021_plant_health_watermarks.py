@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_expertinquiry_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plant',
+            name='health_computed_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='plant',
+            name='health_inputs_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_plant_health_watermarks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlantHealthDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_days', models.IntegerField(default=30)),
+                ('bucket_start', models.DateField()),
+                ('sample_count', models.IntegerField(default=0)),
+                ('score_avg', models.FloatField(default=0.0)),
+                ('score_min', models.IntegerField(default=0)),
+                ('score_max', models.IntegerField(default=0)),
+                ('watering_subscore', models.FloatField(default=0.0)),
+                ('fertilizing_subscore', models.FloatField(default=0.0)),
+                ('disease_subscore', models.FloatField(default=0.0)),
+                ('growth_subscore', models.FloatField(default=0.0)),
+                ('missed_subscore', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('plant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)ss', to='core.plant')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)ss', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['bucket_start'],
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('plant', 'window_days', 'bucket_start'), name='unique_planthealthdailyrollup_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlantHealthWeeklyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_days', models.IntegerField(default=30)),
+                ('bucket_start', models.DateField()),
+                ('sample_count', models.IntegerField(default=0)),
+                ('score_avg', models.FloatField(default=0.0)),
+                ('score_min', models.IntegerField(default=0)),
+                ('score_max', models.IntegerField(default=0)),
+                ('watering_subscore', models.FloatField(default=0.0)),
+                ('fertilizing_subscore', models.FloatField(default=0.0)),
+                ('disease_subscore', models.FloatField(default=0.0)),
+                ('growth_subscore', models.FloatField(default=0.0)),
+                ('missed_subscore', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('plant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)ss', to='core.plant')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)ss', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['bucket_start'],
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('plant', 'window_days', 'bucket_start'), name='unique_planthealthweeklyrollup_bucket')],
+            },
+        ),
+    ]
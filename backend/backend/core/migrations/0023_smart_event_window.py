@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_planthealth_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='smartreminderevent',
+            name='window_start',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='smartreminderevent',
+            constraint=models.UniqueConstraint(fields=('plant', 'event_type', 'window_start'), name='unique_smart_event_window'),
+        ),
+    ]
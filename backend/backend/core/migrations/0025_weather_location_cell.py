@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_geocode_cache_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeatherLocationCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location_key', models.CharField(max_length=160, unique=True)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('timezone', models.CharField(blank=True, default='', max_length=64)),
+                ('last_requested_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:48
+
+from django.db import migrations, models
+
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+# Frozen copy of core.weather_service.encode_geohash at precision 9, so the
+# migration does not depend on application code that may change later.
+def encode_geohash(latitude, longitude, precision=9):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def backfill_geohash(apps, schema_editor):
+    WeatherSnapshot = apps.get_model("core", "WeatherSnapshot")
+    batch = []
+    for snapshot in WeatherSnapshot.objects.filter(geohash="").only("id", "latitude", "longitude").iterator():
+        snapshot.geohash = encode_geohash(snapshot.latitude, snapshot.longitude)
+        batch.append(snapshot)
+        if len(batch) >= 1000:
+            WeatherSnapshot.objects.bulk_update(batch, ["geohash"])
+            batch = []
+    WeatherSnapshot.objects.bulk_update(batch, ["geohash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_weather_location_cell'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weathersnapshot',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
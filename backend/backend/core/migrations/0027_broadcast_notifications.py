@@ -0,0 +1,42 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_weathersnapshot_geohash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BroadcastNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('audience_role', models.CharField(choices=[('user', 'User'), ('expert', 'Expert'), ('admin', 'Admin')], default='user', max_length=20)),
+                ('type', models.CharField(choices=[('expert_reply', 'Expert Reply'), ('new_expert_post', 'New Expert Post'), ('system', 'System')], max_length=50)),
+                ('title', models.CharField(max_length=120)),
+                ('body', models.TextField(blank=True)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['audience_role', '-created_at'], name='core_broadc_audienc_22dabb_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BroadcastReadCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read_through_id', models.PositiveBigIntegerField(default=0)),
+                ('read_ids', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='broadcast_cursor', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -41,9 +41,27 @@ class Plant(models.Model):
     weather_opt_in = models.BooleanField(default=True)
     dynamic_watering_interval = models.IntegerField(default=3)
     last_weather_adjusted_at = models.DateTimeField(null=True, blank=True)
-    
+    health_inputs_changed_at = models.DateTimeField(null=True, blank=True)
+    health_computed_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    WEATHER_DECISION_FIELDS = ("watering_interval", "weather_opt_in", "latitude", "longitude")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_weather_inputs()
+        return instance
 
+    def remember_weather_inputs(self):
+        self._loaded_weather_inputs = {
+            name: self.__dict__[name] for name in self.WEATHER_DECISION_FIELDS if name in self.__dict__
+        }
 
+    def weather_inputs_changed(self) -> bool:
+        loaded = getattr(self, "_loaded_weather_inputs", None)
+        if loaded is None:
+            return True
+        return any(self.__dict__.get(name) != value for name, value in loaded.items())
 
     def __str__(self):
         return self.name
@@ -167,11 +185,51 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-id"]),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.type} - {self.title}"
 
 
+class BroadcastNotification(models.Model):
+    """One row per announcement; recipients are resolved by role when notifications are read."""
+
+    AUDIENCE_CHOICES = Profile.ROLE_CHOICES
+
+    audience_role = models.CharField(max_length=20, choices=AUDIENCE_CHOICES, default="user")
+    type = models.CharField(max_length=50, choices=Notification.TYPE_CHOICES)
+    title = models.CharField(max_length=120)
+    body = models.TextField(blank=True)
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["audience_role", "-created_at"]),
+        ]
+
+    def __str__(self):
+        return f"broadcast to {self.audience_role} - {self.type} - {self.title}"
+
+
+class BroadcastReadCursor(models.Model):
+    """Everything up to ``read_through_id`` is read, plus the individually read ids after it."""
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="broadcast_cursor")
+    read_through_id = models.PositiveBigIntegerField(default=0)
+    read_ids = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def has_read(self, broadcast_id: int) -> bool:
+        return broadcast_id <= self.read_through_id or broadcast_id in self.read_ids
+
+    def __str__(self):
+        return f"{self.user.username} read through {self.read_through_id}"
+
+
 class ExpertPost(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="expert_posts")
     title = models.CharField(max_length=150)
@@ -296,6 +354,7 @@ class WeatherSnapshot(models.Model):
     location_key = models.CharField(max_length=160, db_index=True)
     latitude = models.FloatField()
     longitude = models.FloatField()
+    geohash = models.CharField(max_length=12, blank=True, default="", db_index=True)
     timezone = models.CharField(max_length=64, blank=True, default="")
 
     next24h_rain_prob_max = models.FloatField(default=0.0)
@@ -321,6 +380,30 @@ class WeatherSnapshot(models.Model):
         return f"{self.location_key} @ {self.forecast_at}"
 
 
+class WeatherLocationCell(models.Model):
+    location_key = models.CharField(max_length=160, unique=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    timezone = models.CharField(max_length=64, blank=True, default="")
+    last_requested_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.location_key} (last requested {self.last_requested_at})"
+
+
+class GeocodeCacheEntry(models.Model):
+    query = models.CharField(max_length=160, unique=True)
+    found = models.BooleanField(default=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    timezone = models.CharField(max_length=64, blank=True, default="")
+    resolved_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.query} -> {self.latitude}:{self.longitude}" if self.found else f"{self.query} -> not found"
+
+
 class SmartReminderEvent(models.Model):
     EVENT_CHOICES = [
         ("watering_skipped_rain", "watering_skipped_rain"),
@@ -342,11 +425,18 @@ class SmartReminderEvent(models.Model):
     decision_reason = models.TextField(blank=True, default="")
     effective_from = models.DateTimeField()
     effective_to = models.DateTimeField(null=True, blank=True)
+    window_start = models.DateTimeField(null=True, blank=True)
     is_sent = models.BooleanField(default=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     class Meta:
         ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["plant", "event_type", "window_start"],
+                name="unique_smart_event_window",
+            ),
+        ]
         indexes = [
             models.Index(fields=["plant", "-created_at"]),
             models.Index(fields=["user", "is_sent"]),
@@ -385,6 +475,49 @@ class PlantHealthSnapshot(models.Model):
         return f"{self.plant.name} health {self.score} ({self.version})"
 
 
+class PlantHealthRollup(models.Model):
+    plant = models.ForeignKey(Plant, on_delete=models.CASCADE, related_name="%(class)ss")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="%(class)ss")
+    window_days = models.IntegerField(default=30)
+    bucket_start = models.DateField()
+    sample_count = models.IntegerField(default=0)
+
+    score_avg = models.FloatField(default=0.0)
+    score_min = models.IntegerField(default=0)
+    score_max = models.IntegerField(default=0)
+
+    watering_subscore = models.FloatField(default=0.0)
+    fertilizing_subscore = models.FloatField(default=0.0)
+    disease_subscore = models.FloatField(default=0.0)
+    growth_subscore = models.FloatField(default=0.0)
+    missed_subscore = models.FloatField(default=0.0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+        ordering = ["bucket_start"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["plant", "window_days", "bucket_start"],
+                name="unique_%(class)s_bucket",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.plant.name} health {self.score_avg:.0f} @ {self.bucket_start}"
+
+
+class PlantHealthDailyRollup(PlantHealthRollup):
+    class Meta(PlantHealthRollup.Meta):
+        pass
+
+
+class PlantHealthWeeklyRollup(PlantHealthRollup):
+    class Meta(PlantHealthRollup.Meta):
+        pass
+
+
 class AssistantSession(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="assistant_sessions")
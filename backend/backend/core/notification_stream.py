@@ -0,0 +1,190 @@
+"""Push new notifications to connected clients over server-sent events.
+
+Publishers are the synchronous notification writers (views and Celery tasks);
+subscribers are async SSE responses waiting on an asyncio queue. The in-process
+broker only reaches clients served by the same process, so deployments where
+Celery workers create notifications use the Redis backend, which relays every
+message to the in-process broker of each ASGI worker over one pub/sub channel.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+REDIS_CHANNEL = "notification_stream"
+
+
+def user_target(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def role_target(role: str) -> str:
+    return f"role:{role}"
+
+
+class Subscription:
+    """One connected client: a bounded queue fed from any thread via its event loop."""
+
+    def __init__(self, targets: Sequence[str], maxsize: int):
+        self.targets = tuple(targets)
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, message: Dict[str, Any]) -> None:
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # a client this far behind re-fetches the list when it reconnects
+            pass
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[str, set] = {}
+
+    def subscribe(self, targets: Sequence[str]) -> Subscription:
+        maxsize = getattr(settings, "NOTIFICATION_STREAM_QUEUE_SIZE", 100)
+        subscription = Subscription(targets, maxsize)
+        with self._lock:
+            for target in subscription.targets:
+                self._subscriptions.setdefault(target, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for target in subscription.targets:
+                subscribers = self._subscriptions.get(target)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[target]
+
+    def publish(self, messages: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        for target, message in messages:
+            self.deliver(target, message)
+
+    def deliver(self, target: str, message: Dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._subscriptions.get(target, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+
+class RedisBroker(InProcessBroker):
+    """Publishes through Redis; each process relays the channel into its local subscribers."""
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+        self._client = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def _sync_client(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self.url)
+        return self._client
+
+    def publish(self, messages: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        try:
+            pipe = self._sync_client().pipeline(transaction=False)
+            for target, message in messages:
+                pipe.publish(REDIS_CHANNEL, json.dumps({"target": target, "message": message}, default=str))
+            pipe.execute()
+        except Exception:
+            # live delivery is best effort; the notification row is already committed
+            pass
+
+    def subscribe(self, targets: Sequence[str]) -> Subscription:
+        subscription = super().subscribe(targets)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        return subscription
+
+    async def _listen(self) -> None:
+        import redis.asyncio as aioredis
+
+        while True:
+            client = aioredis.Redis.from_url(self.url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(REDIS_CHANNEL)
+                    async for item in pubsub.listen():
+                        if item.get("type") != "message":
+                            continue
+                        try:
+                            payload = json.loads(item["data"])
+                        except (TypeError, ValueError):
+                            continue
+                        self.deliver(payload.get("target", ""), payload.get("message") or {})
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(getattr(settings, "NOTIFICATION_STREAM_RECONNECT_SECONDS", 2))
+            finally:
+                await client.aclose()
+
+
+_broker: Optional[InProcessBroker] = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> InProcessBroker:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend = getattr(settings, "NOTIFICATION_STREAM_BACKEND", "memory")
+                if backend == "redis":
+                    _broker = RedisBroker(getattr(settings, "NOTIFICATION_STREAM_REDIS_URL", ""))
+                else:
+                    _broker = InProcessBroker()
+    return _broker
+
+
+def publish_notification_items(items: List[Tuple[str, Dict[str, Any]]]) -> None:
+    """Send serialized notifications to their targets; ``items`` pairs a target with one list item."""
+    if items:
+        get_broker().publish((target, {"event": "notification", "data": data}) for target, data in items)
+
+
+def format_event(event: str, data: Dict[str, Any], event_id: Optional[str] = None) -> bytes:
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+async def stream_events(targets: Sequence[str]):
+    """Yield SSE frames for ``targets`` until the client disconnects.
+
+    Waiting is a queue read with a timeout, so an idle connection only costs a
+    comment frame per heartbeat and never touches the database.
+    """
+    heartbeat = getattr(settings, "NOTIFICATION_STREAM_HEARTBEAT_SECONDS", 20)
+    broker = get_broker()
+    subscription = broker.subscribe(targets)
+    try:
+        yield f"retry: {heartbeat * 1000}\n\n".encode()
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            data = message.get("data") or {}
+            yield format_event(message.get("event", "notification"), data, str(data.get("id", "")) or None)
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import BroadcastNotification, BroadcastReadCursor, Notification
+from .notification_stream import publish_notification_items, role_target, user_target
+from .serializers import BroadcastNotificationSerializer, NotificationSerializer
+
+
+def user_role(user: User) -> str:
+    profile = getattr(user, "profile", None)
+    return getattr(profile, "role", None) or "user"
+
+
+def broadcasts_for_user(user: User):
+    # users only see announcements published after they joined, as with per-user rows
+    return BroadcastNotification.objects.filter(audience_role=user_role(user), created_at__gte=user.date_joined)
+
+
+def get_read_cursor(user: User) -> BroadcastReadCursor:
+    """The user's cursor for reading; an unsaved empty one until they first mark a broadcast read."""
+    return BroadcastReadCursor.objects.filter(user=user).first() or BroadcastReadCursor(user=user)
+
+
+def publish_broadcast(audience_role: str, type: str, title: str, body: str = "", data: Dict[str, Any] | None = None) -> BroadcastNotification:
+    broadcast = BroadcastNotification.objects.create(
+        audience_role=audience_role,
+        type=type,
+        title=title,
+        body=body,
+        data=data or {},
+    )
+    transaction.on_commit(lambda: _broadcast_published(broadcast))
+    return broadcast
+
+
+def _broadcast_published(broadcast: BroadcastNotification) -> None:
+    # moving the role's version retires every cached broadcast count for that role at once
+    cache.set(broadcast_version_key(broadcast.audience_role), broadcast.id, None)
+    publish_notification_items([(role_target(broadcast.audience_role), BroadcastNotificationSerializer(broadcast).data)])
+
+
+def create_notifications(notifications: Sequence[Notification]) -> List[Notification]:
+    """Bulk-insert personal notifications, drop the recipients' cached unread counts and push them to open streams."""
+    created = Notification.objects.bulk_create(notifications)
+    if created:
+        transaction.on_commit(lambda: _notifications_created(created))
+    return created
+
+
+def _notifications_created(notifications: List[Notification]) -> None:
+    invalidate_unread_counts({notification.user_id for notification in notifications})
+    publish_notification_items([
+        (user_target(notification.user_id), NotificationSerializer(notification).data)
+        for notification in notifications
+    ])
+
+
+def notify_user(user: User, type: str, title: str, body: str = "", data: Dict[str, Any] | None = None) -> Notification:
+    return create_notifications([Notification(user=user, type=type, title=title, body=body, data=data or {})])[0]
+
+
+# ----- keyset pagination -----
+
+# Personal rows sort ahead of broadcasts created in the same instant; the kind
+# is part of the cursor so ties between the two tables are never skipped.
+PERSONAL_KIND = "n"
+BROADCAST_KIND = "b"
+KIND_RANK = {BROADCAST_KIND: 0, PERSONAL_KIND: 1}
+
+
+def encode_notification_cursor(created_at: datetime, kind: str, item_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{kind}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_notification_cursor(cursor: str) -> Tuple[datetime, str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_raw, kind, item_id = raw.split("|")
+        created_at = datetime.fromisoformat(created_raw)
+        item_id = int(item_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("invalid cursor") from exc
+    if kind not in KIND_RANK or timezone.is_naive(created_at):
+        raise ValueError("invalid cursor")
+    return created_at, kind, item_id
+
+
+def _after_cursor(kind: str, position: Tuple[datetime, str, int]) -> Q:
+    """Rows of ``kind`` that sort strictly after ``position`` in (created_at, kind, id) descending order."""
+    created_at, cursor_kind, cursor_id = position
+    older = Q(created_at__lt=created_at)
+    if KIND_RANK[kind] < KIND_RANK[cursor_kind]:
+        return older | Q(created_at=created_at)
+    if KIND_RANK[kind] == KIND_RANK[cursor_kind]:
+        return older | Q(created_at=created_at, id__lt=cursor_id)
+    return older
+
+
+def paginate_user_notifications(user: User, cursor: Optional[str] = None, limit: int = 50) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of personal notifications and role broadcasts, newest first, plus the cursor for the next page.
+
+    Raises ``ValueError`` for a malformed cursor.
+    """
+    personal = Notification.objects.filter(user=user)
+    broadcasts = broadcasts_for_user(user)
+    if cursor:
+        position = decode_notification_cursor(cursor)
+        personal = personal.filter(_after_cursor(PERSONAL_KIND, position))
+        broadcasts = broadcasts.filter(_after_cursor(BROADCAST_KIND, position))
+
+    # limit + 1 from each side is enough to fill the page and know whether more follow
+    rows = [(PERSONAL_KIND, row) for row in personal.order_by("-created_at", "-id")[: limit + 1]]
+    rows += [(BROADCAST_KIND, row) for row in broadcasts.order_by("-created_at", "-id")[: limit + 1]]
+    rows.sort(key=lambda item: (item[1].created_at, KIND_RANK[item[0]], item[1].id), reverse=True)
+
+    page, has_more = rows[:limit], len(rows) > limit
+    read_cursor = get_read_cursor(user) if any(kind == BROADCAST_KIND for kind, _ in page) else None
+
+    items = []
+    for kind, row in page:
+        if kind == PERSONAL_KIND:
+            items.append(NotificationSerializer(row).data)
+        else:
+            items.append(BroadcastNotificationSerializer(row, context={"cursor": read_cursor}).data)
+
+    next_cursor = None
+    if has_more and page:
+        last_kind, last_row = page[-1]
+        next_cursor = encode_notification_cursor(last_row.created_at, last_kind, last_row.id)
+    return items, next_cursor
+
+
+# ----- cached unread counter -----
+
+# Personal and broadcast unread counts are cached separately: personal counts
+# are adjusted in place, broadcast counts are keyed by the role's latest
+# broadcast id so a new announcement invalidates them without touching users.
+UNREAD_COUNT_TTL_SECONDS = 24 * 60 * 60
+
+
+def personal_unread_key(user_id: int) -> str:
+    return f"notifications_unread:{user_id}"
+
+
+def broadcast_version_key(role: str) -> str:
+    return f"notifications_broadcast_version:{role}"
+
+
+def broadcast_unread_key(user_id: int, version: int) -> str:
+    return f"notifications_unread_broadcasts:{user_id}:{version}"
+
+
+def broadcast_version(role: str) -> int:
+    version = cache.get(broadcast_version_key(role))
+    if version is None:
+        version = BroadcastNotification.objects.filter(audience_role=role).aggregate(latest=Max("id"))["latest"] or 0
+        cache.add(broadcast_version_key(role), version, None)
+    return version
+
+
+def _user_broadcast_unread_key(user: User) -> str:
+    return broadcast_unread_key(user.id, broadcast_version(user_role(user)))
+
+
+def get_unread_count(user: User) -> int:
+    if not getattr(settings, "CACHE_IS_SHARED", False):
+        # notifications written by Celery workers could never invalidate a
+        # process-local cache, so count straight from the database
+        return Notification.objects.filter(user=user, is_read=False).count() + unread_broadcast_count(user)
+
+    personal = cache.get(personal_unread_key(user.id))
+    if personal is None:
+        personal = Notification.objects.filter(user=user, is_read=False).count()
+        cache.set(personal_unread_key(user.id), personal, UNREAD_COUNT_TTL_SECONDS)
+
+    key = _user_broadcast_unread_key(user)
+    broadcasts = cache.get(key)
+    if broadcasts is None:
+        broadcasts = unread_broadcast_count(user)
+        cache.set(key, broadcasts, UNREAD_COUNT_TTL_SECONDS)
+    return max(0, personal) + max(0, broadcasts)
+
+
+def _decrement(key: str) -> None:
+    try:
+        cache.decr(key)
+    except ValueError:
+        # nothing cached yet; the next read recomputes from the database
+        pass
+
+
+def invalidate_unread_counts(user_ids: Iterable[int]) -> None:
+    cache.delete_many([personal_unread_key(user_id) for user_id in user_ids])
+
+
+def mark_personal_notification_read(user: User, notification_id: int) -> bool:
+    notifications = Notification.objects.filter(id=notification_id, user=user)
+    if notifications.filter(is_read=False).update(is_read=True):
+        transaction.on_commit(lambda: _decrement(personal_unread_key(user.id)))
+        return True
+    return notifications.exists()
+
+
+def mark_all_user_notifications_read(user: User) -> None:
+    Notification.objects.filter(user=user, is_read=False).update(is_read=True)
+    mark_all_broadcasts_read(user)
+    # dropped rather than zeroed so a notification landing mid-request is still counted
+    transaction.on_commit(lambda: cache.delete_many([personal_unread_key(user.id), _user_broadcast_unread_key(user)]))
+
+
+def unread_broadcast_count(user: User) -> int:
+    cursor = get_read_cursor(user)
+    unread = broadcasts_for_user(user).filter(id__gt=cursor.read_through_id)
+    if cursor.read_ids:
+        unread = unread.exclude(id__in=cursor.read_ids)
+    return unread.count()
+
+
+def mark_broadcast_read(user: User, broadcast_id: int) -> bool:
+    if not broadcasts_for_user(user).filter(id=broadcast_id).exists():
+        return False
+
+    with transaction.atomic():
+        cursor, _ = BroadcastReadCursor.objects.select_for_update().get_or_create(user=user)
+        if not cursor.has_read(broadcast_id):
+            cursor.read_ids = sorted([*cursor.read_ids, broadcast_id])
+            cursor.save(update_fields=["read_ids", "updated_at"])
+            transaction.on_commit(lambda: _decrement(_user_broadcast_unread_key(user)))
+    return True
+
+
+def mark_all_broadcasts_read(user: User) -> None:
+    latest_id = broadcasts_for_user(user).aggregate(latest=Max("id"))["latest"]
+    if latest_id is None:
+        return
+
+    with transaction.atomic():
+        cursor, _ = BroadcastReadCursor.objects.select_for_update().get_or_create(user=user)
+        if latest_id > cursor.read_through_id:
+            cursor.read_through_id = latest_id
+        cursor.read_ids = [read_id for read_id in cursor.read_ids if read_id > cursor.read_through_id]
+        cursor.save(update_fields=["read_through_id", "read_ids", "updated_at"])
+
+
+def fan_out_to_roles(
+    roles: Sequence[str],
+    type: str,
+    title: str,
+    body: str = "",
+    data: Dict[str, Any] | None = None,
+    batch_size: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    after_user_id: int = 0,
+) -> int:
+    """Write one Notification per user holding any of ``roles``, streaming ids in fixed-size batches.
+
+    Recipients are visited in id order and each batch commits on its own;
+    ``progress(created, last_user_id)`` runs after every batch, and passing that
+    id back as ``after_user_id`` resumes without notifying anyone twice.
+    """
+    batch_size = batch_size or getattr(settings, "NOTIFICATION_FANOUT_BATCH_SIZE", 500)
+    recipient_ids = (
+        User.objects.filter(profile__role__in=list(roles), id__gt=after_user_id)
+        .order_by("id")
+        .values_list("id", flat=True)
+        .iterator(chunk_size=batch_size)
+    )
+
+    created = 0
+    batch: List[Notification] = []
+    for user_id in recipient_ids:
+        batch.append(Notification(user_id=user_id, type=type, title=title, body=body, data=data or {}))
+        if len(batch) >= batch_size:
+            create_notifications(batch)
+            created += len(batch)
+            if progress:
+                progress(created, batch[-1].user_id)
+            batch = []
+
+    if batch:
+        create_notifications(batch)
+        created += len(batch)
+        if progress:
+            progress(created, batch[-1].user_id)
+    return created
@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from .models import Plant ,CareLog,Notification,ExpertPost, CommunityPost, Profile, PlantGrowthEntry, PlantTimelapse
+from .models import Plant ,CareLog,Notification,BroadcastNotification,ExpertPost, CommunityPost, Profile, PlantGrowthEntry, PlantTimelapse
 
 
 # --- Users ---
@@ -216,6 +216,22 @@ class NotificationSerializer(serializers.ModelSerializer):
         fields = ["id", "type", "title", "body", "data", "is_read", "created_at"]
 
 
+class BroadcastNotificationSerializer(serializers.ModelSerializer):
+    id = serializers.SerializerMethodField()
+    is_read = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BroadcastNotification
+        fields = ["id", "type", "title", "body", "data", "is_read", "created_at"]
+
+    def get_id(self, obj):
+        return f"broadcast-{obj.id}"
+
+    def get_is_read(self, obj):
+        cursor = self.context.get("cursor")
+        return bool(cursor and cursor.has_read(obj.id))
+
+
 class ExpertPostSerializer(serializers.ModelSerializer):
     author_username = serializers.CharField(source="author.username", read_only=True)
     author_avatar = serializers.SerializerMethodField(read_only=True)
@@ -448,3 +464,21 @@ class PlantHealthSnapshotSerializer(serializers.ModelSerializer):
             "explanation_json",
             "created_at",
         ]
+
+
+class PlantHealthRollupSerializer(serializers.Serializer):
+    plant = serializers.IntegerField(source="plant_id")
+    window_days = serializers.IntegerField()
+    bucket_start = serializers.DateField()
+    sample_count = serializers.IntegerField()
+    score = serializers.SerializerMethodField()
+    score_min = serializers.IntegerField()
+    score_max = serializers.IntegerField()
+    watering_subscore = serializers.FloatField()
+    fertilizing_subscore = serializers.FloatField()
+    disease_subscore = serializers.FloatField()
+    growth_subscore = serializers.FloatField()
+    missed_subscore = serializers.FloatField()
+
+    def get_score(self, obj):
+        return int(round(obj.score_avg))
@@ -1,8 +1,15 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.db.models.signals import post_migrate
-from .models import Profile
+from .models import Profile, Plant, CareLog, Prediction, Reminder, WeatherSnapshot
+from .health_scoring import mark_plants_health_dirty
+from .tasks import enqueue_task, evaluate_smart_reminders_for_plants, evaluate_smart_reminders_near_snapshots
+from .weather_service import weather_snapshots_stored
+
+HEALTH_INPUT_PLANT_FIELDS = {"watering_interval", "dynamic_watering_interval", "image", "image_url"}
 
 @receiver(post_save, sender=User)
 def ensure_profile_exists(sender, instance, created, **kwargs):
@@ -33,3 +40,47 @@ def ensure_default_admin(sender, **kwargs):
     profile.role = "admin"
     profile.expert_approval_status = "approved"
     profile.save(update_fields=["role", "expert_approval_status"])
+
+
+@receiver(post_save, sender=CareLog)
+@receiver(post_delete, sender=CareLog)
+@receiver(post_save, sender=Prediction)
+@receiver(post_delete, sender=Prediction)
+@receiver(post_save, sender=Reminder)
+@receiver(post_delete, sender=Reminder)
+def mark_plant_health_inputs_changed(sender, instance, origin=None, **kwargs):
+    # rows removed by deleting their plant (or its owner) have nothing left to mark;
+    # marking them would cost one UPDATE per cascaded row
+    if _deleted_with_plant(origin):
+        return
+    mark_plants_health_dirty([instance.plant_id])
+
+
+def _deleted_with_plant(origin) -> bool:
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model in (Plant, User)
+
+
+@receiver(post_save, sender=Plant)
+def mark_plant_health_settings_changed(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields is not None and not HEALTH_INPUT_PLANT_FIELDS.intersection(update_fields):
+        return
+    mark_plants_health_dirty([instance.id])
+
+
+@receiver(post_save, sender=Plant)
+def evaluate_plant_weather_on_change(sender, instance, created, **kwargs):
+    changed = instance.weather_inputs_changed()
+    instance.remember_weather_inputs()
+    if not changed or not instance.weather_opt_in or instance.latitude is None or instance.longitude is None:
+        return
+    plant_id = instance.id
+    transaction.on_commit(lambda: enqueue_task(evaluate_smart_reminders_for_plants, [plant_id]))
+
+
+@receiver(weather_snapshots_stored, sender=WeatherSnapshot)
+def evaluate_plants_on_new_snapshots(sender, snapshots, **kwargs):
+    snapshot_ids = [snapshot.id for snapshot in snapshots]
+    transaction.on_commit(lambda: enqueue_task(evaluate_smart_reminders_near_snapshots, snapshot_ids))
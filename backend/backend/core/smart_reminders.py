@@ -1,12 +1,19 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import timedelta
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 
+from .health_scoring import mark_plants_health_dirty
 from .models import Plant, Reminder, SmartReminderEvent, WeatherSnapshot, Notification
+from .notifications import create_notifications
+from .weather_service import build_location_key, fresh_snapshots_for_points, hourly_counter_series, increment_hourly_counter
 
 
 @dataclass
@@ -18,38 +25,130 @@ class SmartDecision:
     reason: str
 
 
+@dataclass(frozen=True)
+class WeatherThresholds:
+    rain_prob_skip: float
+    rain_mm_skip: float
+    heatwave_c: float
+    frost_c: float
+
+
 class WeatherDecisionEngine:
     RAIN_PROB_SKIP = 0.60
     RAIN_MM_SKIP = 2.0
     HEATWAVE_C = 35.0
     FROST_C = 2.0
+    HOT_INTERVAL_C = 32.0
+    COOL_INTERVAL_C = 10.0
+    MAX_INTERVAL_DAYS = 14
+
+    @classmethod
+    def thresholds(cls) -> WeatherThresholds:
+        return WeatherThresholds(
+            rain_prob_skip=getattr(settings, "WEATHER_RAIN_PROB_SKIP_THRESHOLD", cls.RAIN_PROB_SKIP),
+            rain_mm_skip=getattr(settings, "WEATHER_RAIN_MM_SKIP_THRESHOLD", cls.RAIN_MM_SKIP),
+            heatwave_c=getattr(settings, "WEATHER_HEATWAVE_THRESHOLD_C", cls.HEATWAVE_C),
+            frost_c=getattr(settings, "WEATHER_FROST_THRESHOLD_C", cls.FROST_C),
+        )
+
+    @staticmethod
+    def describe(snapshot: WeatherSnapshot) -> str:
+        return (
+            f"rain_prob={snapshot.next24h_rain_prob_max:.2f}, rain_mm={snapshot.next24h_rain_mm_sum:.2f}, "
+            f"tmax={snapshot.next48h_temp_max:.1f}, tmin={snapshot.next48h_temp_min:.1f}"
+        )
 
     @classmethod
-    def evaluate(cls, base_interval: int, snapshot: WeatherSnapshot) -> SmartDecision:
+    def evaluate(cls, base_interval: int, snapshot: WeatherSnapshot, thresholds: Optional[WeatherThresholds] = None) -> SmartDecision:
+        thresholds = thresholds or cls.thresholds()
         rain_prob = snapshot.next24h_rain_prob_max
         rain_mm = snapshot.next24h_rain_mm_sum
         tmax = snapshot.next48h_temp_max
         tmin = snapshot.next48h_temp_min
 
-        skip = rain_prob >= cls.RAIN_PROB_SKIP or rain_mm >= cls.RAIN_MM_SKIP
-        heat = tmax >= cls.HEATWAVE_C
-        frost = tmin <= cls.FROST_C
+        skip = rain_prob >= thresholds.rain_prob_skip or rain_mm >= thresholds.rain_mm_skip
+        heat = tmax >= thresholds.heatwave_c
+        frost = tmin <= thresholds.frost_c
 
         recommended = base_interval
-        if tmax >= 32:
+        if tmax >= cls.HOT_INTERVAL_C:
             recommended = max(1, base_interval - 1)
-        elif tmax <= 10:
-            recommended = min(14, base_interval + 1)
+        elif tmax <= cls.COOL_INTERVAL_C:
+            recommended = min(cls.MAX_INTERVAL_DAYS, base_interval + 1)
+
+        return SmartDecision(skip, heat, frost, recommended, cls.describe(snapshot))
 
-        reason = f"rain_prob={rain_prob:.2f}, rain_mm={rain_mm:.2f}, tmax={tmax:.1f}, tmin={tmin:.1f}"
-        return SmartDecision(skip, heat, frost, recommended, reason)
+    @classmethod
+    def evaluate_batch(
+        cls,
+        base_intervals: np.ndarray,
+        rain_prob: np.ndarray,
+        rain_mm: np.ndarray,
+        tmax: np.ndarray,
+        tmin: np.ndarray,
+        thresholds: Optional[WeatherThresholds] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Column-wise evaluate(): one entry per plant in every input and output array."""
+        thresholds = thresholds or cls.thresholds()
+        base_intervals = np.asarray(base_intervals, dtype=np.int64)
+        tmax = np.asarray(tmax, dtype=float)
 
+        recommended = np.where(
+            tmax >= cls.HOT_INTERVAL_C,
+            np.maximum(1, base_intervals - 1),
+            np.where(tmax <= cls.COOL_INTERVAL_C, np.minimum(cls.MAX_INTERVAL_DAYS, base_intervals + 1), base_intervals),
+        )
+        return {
+            "skip": (np.asarray(rain_prob, dtype=float) >= thresholds.rain_prob_skip)
+            | (np.asarray(rain_mm, dtype=float) >= thresholds.rain_mm_skip),
+            "heat": tmax >= thresholds.heatwave_c,
+            "frost": np.asarray(tmin, dtype=float) <= thresholds.frost_c,
+            "recommended": recommended,
+        }
 
-def create_event(plant: Plant, event_type: str, severity: str, reason: str, days_valid: int = 1) -> SmartReminderEvent:
-    now = timezone.now()
-    return SmartReminderEvent.objects.create(
+    @classmethod
+    def evaluate_pairs(cls, pairs: Sequence[Tuple[Plant, WeatherSnapshot]]) -> Dict[int, SmartDecision]:
+        """evaluate() for many (plant, snapshot) pairs with one vectorized pass."""
+        if not pairs:
+            return {}
+
+        columns = np.array(
+            [
+                (
+                    plant.watering_interval or 3,
+                    snapshot.next24h_rain_prob_max,
+                    snapshot.next24h_rain_mm_sum,
+                    snapshot.next48h_temp_max,
+                    snapshot.next48h_temp_min,
+                )
+                for plant, snapshot in pairs
+            ],
+            dtype=float,
+        )
+        result = cls.evaluate_batch(
+            columns[:, 0].astype(np.int64), columns[:, 1], columns[:, 2], columns[:, 3], columns[:, 4]
+        )
+
+        reasons: Dict[int, str] = {}
+        decisions: Dict[int, SmartDecision] = {}
+        for index, (plant, snapshot) in enumerate(pairs):
+            reason = reasons.get(id(snapshot))
+            if reason is None:
+                reason = reasons[id(snapshot)] = cls.describe(snapshot)
+            decisions[plant.id] = SmartDecision(
+                bool(result["skip"][index]),
+                bool(result["heat"][index]),
+                bool(result["frost"][index]),
+                int(result["recommended"][index]),
+                reason,
+            )
+        return decisions
+
+
+def build_event(plant: Plant, event_type: str, severity: str, reason: str, now: datetime, days_valid: int = 1) -> SmartReminderEvent:
+    return SmartReminderEvent(
         plant=plant,
-        user=plant.user,
+        user_id=plant.user_id,
         event_type=event_type,
         severity=severity,
         decision_reason=reason,
@@ -58,56 +157,223 @@ def create_event(plant: Plant, event_type: str, severity: str, reason: str, days
     )
 
 
-def apply_weather_to_plant_reminders(plant: Plant, snapshot: Optional[WeatherSnapshot]) -> Optional[SmartDecision]:
-    if snapshot is None or not plant.weather_opt_in:
-        return None
+DEDUPED_EVENT_TYPES = {"heatwave_alert", "frost_warning", "watering_skipped_rain"}
+
+
+def event_window_start(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def record_events(events: Sequence[SmartReminderEvent], now: datetime) -> None:
+    """Insert new events; ongoing conditions extend the open event for (plant, event_type) instead."""
+    fresh = [event for event in events if event.event_type not in DEDUPED_EVENT_TYPES]
+    pending: Dict[Tuple[int, str], SmartReminderEvent] = {}
+    for event in events:
+        if event.event_type in DEDUPED_EVENT_TYPES:
+            pending.setdefault((event.plant_id, event.event_type), event)
+
+    extended = []
+    if pending:
+        open_events = SmartReminderEvent.objects.filter(
+            plant_id__in={plant_id for plant_id, _ in pending},
+            event_type__in={event_type for _, event_type in pending},
+            window_start__isnull=False,
+            effective_to__gte=now,
+        ).order_by("-effective_to")
+        for current in open_events:
+            event = pending.pop((current.plant_id, current.event_type), None)
+            if event is None:
+                continue
+            current.effective_to = max(current.effective_to, event.effective_to)
+            current.decision_reason = event.decision_reason
+            extended.append(current)
+
+        for event in pending.values():
+            event.window_start = event_window_start(event.effective_from)
+
+    SmartReminderEvent.objects.bulk_update(extended, ["effective_to", "decision_reason"])
+    SmartReminderEvent.objects.bulk_create(
+        list(pending.values()),
+        update_conflicts=True,
+        unique_fields=["plant", "event_type", "window_start"],
+        update_fields=["effective_to", "decision_reason"],
+    )
+    SmartReminderEvent.objects.bulk_create(fresh)
+
+
+def apply_weather_to_plants_bulk(pairs: Sequence[Tuple[Plant, Optional[WeatherSnapshot]]]) -> Dict[int, SmartDecision]:
+    pairs = [(plant, snapshot) for plant, snapshot in pairs if snapshot is not None and plant.weather_opt_in]
+    if not pairs:
+        return {}
 
-    base_interval = plant.watering_interval or 3
-    decision = WeatherDecisionEngine.evaluate(base_interval, snapshot)
+    now = timezone.now()
+    plants_by_id = {plant.id: plant for plant, _ in pairs}
+    changed_plants = []
+    events = []
+
+    decisions: Dict[int, SmartDecision] = WeatherDecisionEngine.evaluate_pairs(pairs)
+    for plant, _ in pairs:
+        decision = decisions[plant.id]
 
-    if plant.dynamic_watering_interval != decision.recommended_interval_days:
-        plant.dynamic_watering_interval = decision.recommended_interval_days
-        plant.last_weather_adjusted_at = timezone.now()
-        plant.save(update_fields=["dynamic_watering_interval", "last_weather_adjusted_at"])
-        create_event(plant, "interval_adjusted", "low", decision.reason)
+        if plant.dynamic_watering_interval != decision.recommended_interval_days:
+            plant.dynamic_watering_interval = decision.recommended_interval_days
+            plant.last_weather_adjusted_at = now
+            changed_plants.append(plant)
+            events.append(build_event(plant, "interval_adjusted", "low", decision.reason, now))
 
-    if decision.send_heatwave:
-        create_event(plant, "heatwave_alert", "high", decision.reason)
+        if decision.send_heatwave:
+            events.append(build_event(plant, "heatwave_alert", "high", decision.reason, now))
 
-    if decision.send_frost:
-        create_event(plant, "frost_warning", "high", decision.reason)
+        if decision.send_frost:
+            events.append(build_event(plant, "frost_warning", "high", decision.reason, now))
 
-    watering_reminders = Reminder.objects.filter(plant=plant, user=plant.user, type="Watering")
+    skipped_reminders = []
+    retimed_reminders = []
+    watering_reminders = Reminder.objects.filter(
+        plant_id__in=list(decisions),
+        user_id=F("plant__user_id"),
+        type="Watering",
+    ).order_by("id")
     for reminder in watering_reminders:
+        decision = decisions[reminder.plant_id]
         if decision.skip_watering:
             reminder.next_run = reminder.next_run + timedelta(days=1)
-            reminder.save(update_fields=["next_run"])
-            create_event(plant, "watering_skipped_rain", "medium", decision.reason)
-        else:
+            skipped_reminders.append(reminder)
+            events.append(build_event(plants_by_id[reminder.plant_id], "watering_skipped_rain", "medium", decision.reason, now))
+        elif reminder.frequency_days != decision.recommended_interval_days:
             reminder.frequency_days = decision.recommended_interval_days
-            reminder.save(update_fields=["frequency_days"])
+            retimed_reminders.append(reminder)
 
-    return decision
+    with transaction.atomic():
+        Plant.objects.bulk_update(changed_plants, ["dynamic_watering_interval", "last_weather_adjusted_at"])
+        Reminder.objects.bulk_update(skipped_reminders, ["next_run"])
+        Reminder.objects.bulk_update(retimed_reminders, ["frequency_days"])
+        record_events(events, now)
 
+    # bulk writes skip the model signals that normally flag health inputs as changed
+    mark_plants_health_dirty(
+        [plant.id for plant in changed_plants]
+        + [reminder.plant_id for reminder in skipped_reminders + retimed_reminders]
+    )
+    return decisions
 
-def dispatch_unsent_smart_events(limit: int = 200) -> int:
-    events = SmartReminderEvent.objects.filter(is_sent=False).select_related("plant", "user")[:limit]
-    count = 0
-    for event in events:
-        title_map = {
-            "watering_skipped_rain": "Watering skipped due to expected rain ☔",
-            "heatwave_alert": "Heatwave alert for your plant 🌡️",
-            "frost_warning": "Frost warning for your plant ❄️",
-            "interval_adjusted": "Watering interval adjusted automatically",
-        }
-        Notification.objects.create(
-            user=event.user,
+
+def evaluate_plants_with_fresh_snapshots(plants: Sequence[Plant]) -> int:
+    """Apply the current forecast to each plant that has a fresh snapshot for its cell (or a nearby one)."""
+    keys_by_plant = {
+        plant.id: build_location_key(plant.latitude, plant.longitude)
+        for plant in plants
+        if plant.latitude is not None and plant.longitude is not None
+    }
+    snapshots = fresh_snapshots_for_points({
+        keys_by_plant[plant.id]: (plant.latitude, plant.longitude)
+        for plant in plants
+        if plant.id in keys_by_plant
+    })
+    pairs = [
+        (plant, snapshots[keys_by_plant[plant.id]])
+        for plant in plants
+        if keys_by_plant.get(plant.id) in snapshots
+    ]
+    return len(apply_weather_to_plants_bulk(pairs))
+
+
+SMART_EVALUATION_SOURCES = ("scan", "snapshot", "plant_change", "sync")
+
+
+def record_smart_evaluations(source: str, count: int) -> None:
+    increment_hourly_counter("smart_evaluations", source, count)
+
+
+def smart_evaluation_stats(hours: int = 24) -> Dict[str, object]:
+    series = hourly_counter_series("smart_evaluations", SMART_EVALUATION_SOURCES, hours)
+    by_source = {source: sum(row[source] for row in series) for source in SMART_EVALUATION_SOURCES}
+    total = sum(by_source.values())
+    return {
+        "hours": hours,
+        "evaluated": total,
+        "evaluated_per_hour": round(total / hours, 2),
+        "by_source": by_source,
+        "series": series,
+    }
+
+
+def apply_weather_to_plant_reminders(plant: Plant, snapshot: Optional[WeatherSnapshot]) -> Optional[SmartDecision]:
+    return apply_weather_to_plants_bulk([(plant, snapshot)]).get(plant.id)
+
+
+SMART_EVENT_TITLES = {
+    "watering_skipped_rain": "Watering skipped due to expected rain ☔",
+    "heatwave_alert": "Heatwave alert for your plant 🌡️",
+    "frost_warning": "Frost warning for your plant ❄️",
+    "interval_adjusted": "Watering interval adjusted automatically",
+}
+
+SMART_EVENT_DIGEST_TITLES = {
+    "watering_skipped_rain": "Watering skipped for {count} plants due to expected rain ☔",
+    "heatwave_alert": "Heatwave alert for {count} of your plants 🌡️",
+    "frost_warning": "Frost warning for {count} of your plants ❄️",
+    "interval_adjusted": "Watering interval adjusted for {count} plants",
+}
+
+DIGEST_MAX_LISTED_PLANTS = 10
+
+
+def build_smart_notification(user_id: int, event_type: str, events: List[SmartReminderEvent]) -> Notification:
+    plants = {event.plant_id: event.plant.name for event in events}
+    if len(plants) == 1:
+        event = events[-1]
+        return Notification(
+            user_id=user_id,
             type="system",
-            title=title_map.get(event.event_type, "Smart reminder update"),
+            title=SMART_EVENT_TITLES.get(event_type, "Smart reminder update"),
             body=f"{event.plant.name}: {event.decision_reason}",
-            data={"plant_id": event.plant_id, "smart_event_id": event.id, "event_type": event.event_type},
+            data={"plant_id": event.plant_id, "smart_event_id": event.id, "event_type": event_type},
         )
-        event.is_sent = True
-        event.save(update_fields=["is_sent"])
-        count += 1
-    return count
+
+    names = list(plants.values())[:DIGEST_MAX_LISTED_PLANTS]
+    body = ", ".join(names)
+    if len(plants) > len(names):
+        body += f" and {len(plants) - len(names)} more"
+    title = SMART_EVENT_DIGEST_TITLES.get(event_type, "Smart reminder update for {count} plants")
+    return Notification(
+        user_id=user_id,
+        type="system",
+        title=title.format(count=len(plants)),
+        body=f"{body}: {events[-1].decision_reason}",
+        data={
+            "plant_ids": list(plants),
+            "smart_event_ids": [event.id for event in events],
+            "event_type": event_type,
+        },
+    )
+
+
+def dispatch_unsent_smart_events(limit: int = 200) -> int:
+    # Events younger than the digest window are left for the next run so a
+    # weather wave across many plants lands in one notification per user.
+    window = getattr(settings, "SMART_EVENT_DIGEST_WINDOW_SECONDS", 120)
+    cutoff = timezone.now() - timedelta(seconds=window)
+
+    # skip_locked lets parallel dispatchers claim disjoint batches; the claim
+    # and the is_sent flip commit together, so no event is sent twice.
+    with transaction.atomic():
+        events = list(
+            SmartReminderEvent.objects.select_for_update(skip_locked=True, of=("self",))
+            .filter(is_sent=False, created_at__lte=cutoff)
+            .select_related("plant")
+            .order_by("id")[:limit]
+        )
+        if not events:
+            return 0
+
+        groups: Dict[Tuple[int, str], List[SmartReminderEvent]] = {}
+        for event in events:
+            groups.setdefault((event.user_id, event.event_type), []).append(event)
+
+        create_notifications([
+            build_smart_notification(user_id, event_type, grouped)
+            for (user_id, event_type), grouped in groups.items()
+        ])
+        SmartReminderEvent.objects.filter(id__in=[event.id for event in events]).update(is_sent=True)
+    return len(events)
@@ -1,13 +1,54 @@
 from __future__ import annotations
 
-from celery import shared_task
+import time
+from datetime import timedelta
+from typing import List, Tuple
+
+from celery import chord, group, shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
 from django.utils import timezone
 
 from .models import Plant, WeatherSnapshot
 from .models import AssistantExpertTip, ExpertPost
-from .smart_reminders import apply_weather_to_plant_reminders, dispatch_unsent_smart_events
-from .weather_service import WeatherAPIClient, build_location_key
-from .health_scoring import compute_and_store_plant_health
+from .notifications import fan_out_to_roles
+from .smart_reminders import (
+    apply_weather_to_plants_bulk,
+    dispatch_unsent_smart_events,
+    evaluate_plants_with_fresh_snapshots,
+    record_smart_evaluations,
+)
+from .weather_service import (
+    WeatherAPIClient,
+    active_location_cells,
+    build_location_key,
+    fetch_or_reuse_snapshot,
+    fetch_or_reuse_snapshots,
+    fresh_snapshots_for_points,
+    plants_near_snapshots,
+    prune_expired_weather_snapshots,
+)
+from .health_scoring import (
+    compute_and_store_plant_health,
+    compute_and_store_plant_health_bulk,
+    health_recompute_pending_key,
+    is_health_dirty,
+    prune_rolled_up_health_snapshots,
+    refresh_plant_health_decay_bulk,
+    rollup_health_snapshots,
+)
+
+
+def weather_sync_lock_key(location_key: str) -> str:
+    return f"weather_sync_pending:{location_key}"
+
+
+def enqueue_task(task, *args, **kwargs):
+    try:
+        return task.delay(*args, **kwargs)
+    except Exception:
+        return task.apply(args=args, kwargs=kwargs)
 
 
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
@@ -31,53 +72,252 @@ def sync_weather_snapshot_for_plant(self, plant_id: int):
         plant.location_timezone = coords.timezone
         plant.save(update_fields=["latitude", "longitude", "location_timezone"])
 
-    summary = WeatherAPIClient.fetch_forecast_summary(latitude, longitude, plant.location_timezone or "auto")
     location_key = build_location_key(latitude, longitude)
+    snapshot, fetched = fetch_or_reuse_snapshot(location_key, latitude, longitude, plant.location_timezone or "auto")
+    return {"status": "ok", "plant_id": plant.id, "snapshot_id": snapshot.id, "fetched": fetched}
 
-    snapshot = WeatherSnapshot.objects.create(
-        location_key=location_key,
-        latitude=latitude,
-        longitude=longitude,
-        timezone=summary["timezone"],
-        next24h_rain_prob_max=summary["next24h_rain_prob_max"],
-        next24h_rain_mm_sum=summary["next24h_rain_mm_sum"],
-        next48h_temp_max=summary["next48h_temp_max"],
-        next48h_temp_min=summary["next48h_temp_min"],
-        frost_risk=summary["frost_risk"],
-        heatwave_risk=summary["heatwave_risk"],
-        provider=summary["provider"],
-        payload=summary["payload"],
-        forecast_at=summary["forecast_at"],
-        expires_at=summary["expires_at"],
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def sync_weather_for_location(
+    self,
+    location_key: str,
+    latitude: float,
+    longitude: float,
+    timezone_name: str = "auto",
+    plant_ids=None,
+    refresh_margin_seconds: int = 0,
+):
+    result = sync_weather_for_locations.run(
+        {
+            location_key: {
+                "latitude": latitude,
+                "longitude": longitude,
+                "timezone_name": timezone_name,
+                "plant_ids": plant_ids or [],
+            }
+        },
+        refresh_margin_seconds=refresh_margin_seconds,
     )
-    return {"status": "ok", "plant_id": plant.id, "snapshot_id": snapshot.id}
+    cell = result["cells"][location_key]
+    return {"status": "ok", "location_key": location_key, **cell}
 
 
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
-def evaluate_smart_reminders(self):
-    plants = Plant.objects.filter(weather_opt_in=True).select_related("user")
-    processed = 0
+def sync_weather_for_locations(self, cells, refresh_margin_seconds: int = 0):
+    """Refresh many cells with batched upstream calls, then evaluate each cell's waiting plants."""
+    fresh_until = timezone.now() + timedelta(seconds=refresh_margin_seconds) if refresh_margin_seconds else None
+    try:
+        snapshots = fetch_or_reuse_snapshots(cells, fresh_until)
+    finally:
+        cache.delete_many([weather_sync_lock_key(location_key) for location_key in cells])
 
-    for plant in plants:
-        if plant.latitude is None or plant.longitude is None:
-            sync_weather_snapshot_for_plant.delay(plant.id)
-            continue
+    # Cells that got a new snapshot are evaluated by the weather_snapshots_stored handler;
+    # only waiting plants in cells served from an existing snapshot are applied here.
+    stored_ids = {snapshot.id for snapshot, fetched in snapshots.values() if fetched}
+    plant_cells = {
+        plant_id: location_key
+        for location_key, cell in cells.items()
+        if snapshots[location_key][0].id not in stored_ids
+        for plant_id in cell.get("plant_ids") or []
+    }
+    plants = Plant.objects.filter(id__in=list(plant_cells), weather_opt_in=True)
+    decisions = apply_weather_to_plants_bulk([(plant, snapshots[plant_cells[plant.id]][0]) for plant in plants])
+    record_smart_evaluations("sync", len(decisions))
 
-        location_key = build_location_key(plant.latitude, plant.longitude)
-        snapshot = (
-            WeatherSnapshot.objects.filter(location_key=location_key, expires_at__gte=timezone.now())
-            .order_by("-forecast_at")
-            .first()
-        )
+    evaluated = {location_key: 0 for location_key in cells}
+    for plant_id in decisions:
+        evaluated[plant_cells[plant_id]] += 1
 
-        if snapshot is None:
-            sync_weather_snapshot_for_plant.delay(plant.id)
+    return {
+        "status": "ok",
+        "fetched": sum(1 for _, fetched in snapshots.values() if fetched),
+        "evaluated": len(decisions),
+        "cells": {
+            location_key: {"snapshot_id": snapshot.id, "fetched": fetched, "evaluated": evaluated[location_key]}
+            for location_key, (snapshot, fetched) in snapshots.items()
+        },
+    }
+
+
+def queue_location_syncs(cells, refresh_margin_seconds: int = 0, spread_seconds: int = 0) -> int:
+    """Lock and enqueue cells in batches of WEATHER_BATCH_MAX_POINTS; returns the number of cells queued.
+
+    Without a shared cache cells are enqueued unlocked, so overlapping runs may queue a cell twice.
+    """
+    lock_seconds = getattr(settings, "WEATHER_SYNC_LOCK_SECONDS", 10 * 60)
+    batch_size = max(1, getattr(settings, "WEATHER_BATCH_MAX_POINTS", 50))
+    # the worker that releases a lock runs in another process, so locking needs a shared cache;
+    # under LocMem a lock would never be released and the cell would stay unsynced for its TTL
+    use_locks = getattr(settings, "CACHE_IS_SHARED", False)
+    keys = list(cells)
+    batch_count = (len(keys) + batch_size - 1) // batch_size
+
+    queued = 0
+    for index in range(batch_count):
+        countdown = int(spread_seconds * index / batch_count)
+        # the lock covers the time the sync task sits in the queue
+        batch = {
+            location_key: cells[location_key]
+            for location_key in keys[index * batch_size:(index + 1) * batch_size]
+            if not use_locks or cache.add(weather_sync_lock_key(location_key), True, timeout=lock_seconds + countdown)
+        }
+        if not batch:
             continue
+        sync_weather_for_locations.apply_async(
+            args=[batch],
+            kwargs={"refresh_margin_seconds": refresh_margin_seconds},
+            countdown=countdown,
+        )
+        queued += len(batch)
+    return queued
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def evaluate_smart_reminders(self, chunk_size=None):
+    chunk_size = chunk_size or getattr(settings, "WEATHER_EVALUATION_CHUNK_SIZE", 500)
+    processed = 0
+    due_cells = {}
+    counter = QueryCounter()
+
+    with connection.execute_wrapper(counter):
+        last_id = 0
+        while True:
+            plants = list(
+                Plant.objects.filter(weather_opt_in=True, id__gt=last_id).order_by("id")[:chunk_size]
+            )
+            if not plants:
+                break
+            last_id = plants[-1].id
+
+            keys_by_plant = {
+                plant.id: build_location_key(plant.latitude, plant.longitude)
+                for plant in plants
+                if plant.latitude is not None and plant.longitude is not None
+            }
+            snapshots = fresh_snapshots_for_points({
+                keys_by_plant[plant.id]: (plant.latitude, plant.longitude)
+                for plant in plants
+                if plant.id in keys_by_plant
+            })
+            ready = []
+
+            for plant in plants:
+                location_key = keys_by_plant.get(plant.id)
+                if location_key is None:
+                    sync_weather_snapshot_for_plant.delay(plant.id)
+                    continue
+
+                snapshot = snapshots.get(location_key)
+                if snapshot is None:
+                    cell = due_cells.setdefault(
+                        location_key,
+                        {
+                            "latitude": plant.latitude,
+                            "longitude": plant.longitude,
+                            "timezone_name": plant.location_timezone or "auto",
+                            "plant_ids": [],
+                        },
+                    )
+                    cell["plant_ids"].append(plant.id)
+                    continue
+
+                ready.append((plant, snapshot))
+
+            processed += len(apply_weather_to_plants_bulk(ready))
+
+    cells_queued = queue_location_syncs(due_cells)
+    record_smart_evaluations("scan", processed)
+
+    return {
+        "status": "ok",
+        "processed": processed,
+        "due_cells": len(due_cells),
+        "cells_queued": cells_queued,
+        "queries": counter.count,
+    }
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def evaluate_smart_reminders_for_plants(self, plant_ids, source="plant_change"):
+    plants = list(Plant.objects.filter(id__in=plant_ids, weather_opt_in=True))
+    evaluated = evaluate_plants_with_fresh_snapshots(plants)
+    record_smart_evaluations(source, evaluated)
+    return {"status": "ok", "source": source, "evaluated": evaluated}
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def evaluate_smart_reminders_near_snapshots(self, snapshot_ids, chunk_size=None):
+    """Evaluate only the plants a newly stored snapshot can serve."""
+    chunk_size = chunk_size or getattr(settings, "WEATHER_EVALUATION_CHUNK_SIZE", 500)
+    snapshots = list(WeatherSnapshot.objects.filter(id__in=snapshot_ids))
+
+    evaluated = 0
+    last_id = 0
+    while True:
+        plants = list(plants_near_snapshots(snapshots).filter(id__gt=last_id).order_by("id")[:chunk_size])
+        if not plants:
+            break
+        last_id = plants[-1].id
+        evaluated += evaluate_plants_with_fresh_snapshots(plants)
 
-        apply_weather_to_plant_reminders(plant, snapshot)
-        processed += 1
+    record_smart_evaluations("snapshot", evaluated)
+    return {"status": "ok", "snapshots": len(snapshots), "evaluated": evaluated}
 
-    return {"status": "ok", "processed": processed}
+
+@shared_task
+def prefetch_expiring_forecasts():
+    """Refresh active cells before their snapshot expires, spreading upstream calls over the run."""
+    now = timezone.now()
+    margin_seconds = getattr(settings, "WEATHER_PREFETCH_MARGIN_MINUTES", 60) * 60
+    spread_seconds = getattr(settings, "WEATHER_PREFETCH_SPREAD_SECONDS", 8 * 60)
+
+    cells = active_location_cells(now)
+    fresh = fresh_snapshots_for_points(
+        {location_key: (cell["latitude"], cell["longitude"]) for location_key, cell in cells.items()},
+        now=now + timedelta(seconds=margin_seconds),
+    )
+    due = sorted(key for key in cells if key not in fresh)
+
+    queued = queue_location_syncs(
+        {location_key: cells[location_key] for location_key in due},
+        refresh_margin_seconds=margin_seconds,
+        spread_seconds=spread_seconds,
+    )
+    return {"status": "ok", "active_cells": len(cells), "due_cells": len(due), "cells_queued": queued}
+
+
+@shared_task(bind=True, max_retries=3)
+def fan_out_role_notifications(self, roles, type, title, body="", data=None, batch_size=None, after_user_id=0, created=0):
+    # Batches commit one by one, so a blind autoretry would notify the first
+    # recipients again; retries resume after the last committed recipient instead.
+    resume = {"after_user_id": after_user_id, "created": created}
+
+    def report(batch_created, last_user_id):
+        resume.update(after_user_id=last_user_id, created=created + batch_created)
+        if self.request.id:
+            self.update_state(state="PROGRESS", meta={"created": resume["created"]})
+
+    try:
+        fan_out_to_roles(roles, type, title, body, data, batch_size=batch_size, progress=report, after_user_id=after_user_id)
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=2 ** self.request.retries, kwargs={**(self.request.kwargs or {}), **resume})
+    return {"status": "ok", "created": resume["created"]}
+
+
+@shared_task
+def prune_weather_snapshots(retention_hours=None):
+    retention_hours = retention_hours or getattr(settings, "WEATHER_SNAPSHOT_RETENTION_HOURS", 48)
+    deleted = prune_expired_weather_snapshots(retention_hours)
+    return {"status": "ok", "deleted": deleted}
 
 
 @shared_task
@@ -90,17 +330,109 @@ def dispatch_smart_notifications():
 def recompute_plant_health_score(self, plant_id: int, window_days: int = 30):
     plant = Plant.objects.get(id=plant_id)
     snapshot = compute_and_store_plant_health(plant, window_days=window_days)
+    cache.delete(health_recompute_pending_key(plant.id))
     return {"status": "ok", "plant_id": plant.id, "score": snapshot.score, "snapshot_id": snapshot.id}
 
 
+def plant_id_ranges(chunk_size: int) -> List[Tuple[int, int]]:
+    ranges = []
+    start_id = last_id = None
+    for index, plant_id in enumerate(Plant.objects.order_by("id").values_list("id", flat=True).iterator(chunk_size=2000)):
+        if index % chunk_size == 0:
+            if start_id is not None:
+                ranges.append((start_id, last_id))
+            start_id = plant_id
+        last_id = plant_id
+    if start_id is not None:
+        ranges.append((start_id, last_id))
+    return ranges
+
+
+def _dispatch_health_chunks(chunk_task, job: str, chunk_size=None, **chunk_kwargs):
+    chunk_size = chunk_size or getattr(settings, "HEALTH_RECOMPUTE_CHUNK_SIZE", 500)
+    ranges = plant_id_ranges(chunk_size)
+    if not ranges:
+        return {"status": "ok", "job": job, "chunks": 0, "processed": 0}
+
+    header = group(chunk_task.s(start_id, end_id, **chunk_kwargs) for start_id, end_id in ranges)
+    result = chord(header)(summarize_health_recompute.s(job=job, started_at=time.time()))
+    return {"status": "dispatched", "job": job, "chunks": len(ranges), "summary_task_id": result.id}
+
+
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
-def recompute_all_health_scores(self, window_days: int = 30):
-    plants = Plant.objects.select_related("user").all()
-    processed = 0
-    for plant in plants:
-        compute_and_store_plant_health(plant, window_days=window_days)
-        processed += 1
-    return {"status": "ok", "processed": processed}
+def recompute_health_chunk(self, start_id: int, end_id: int, window_days: int = 30, windows=None):
+    started = time.monotonic()
+    plants = list(Plant.objects.filter(id__gte=start_id, id__lte=end_id).order_by("id"))
+    written = compute_and_store_plant_health_bulk(plants, window_days=window_days, windows=windows)
+    return {
+        "start_id": start_id,
+        "end_id": end_id,
+        "processed": len(plants),
+        "written": len(written),
+        "seconds": round(time.monotonic() - started, 3),
+    }
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def recompute_dirty_health_chunk(self, start_id: int, end_id: int, window_days: int = 30):
+    started = time.monotonic()
+    now = timezone.now()
+    plants = list(Plant.objects.filter(id__gte=start_id, id__lte=end_id).order_by("id"))
+
+    dirty = [plant for plant in plants if is_health_dirty(plant, now)]
+    clean = [plant for plant in plants if not is_health_dirty(plant, now)]
+
+    refreshed, missing = refresh_plant_health_decay_bulk(clean, window_days=window_days)
+    dirty.extend(missing)
+    written = compute_and_store_plant_health_bulk(dirty, window_days=window_days)
+
+    return {
+        "start_id": start_id,
+        "end_id": end_id,
+        "processed": len(plants),
+        "recomputed": len(dirty),
+        "decay_refreshed": len(refreshed),
+        "written": len(written) + len(refreshed),
+        "seconds": round(time.monotonic() - started, 3),
+    }
+
+
+@shared_task
+def summarize_health_recompute(results, job: str, started_at: float):
+    chunk_seconds = [result["seconds"] for result in results]
+    summary = {
+        "status": "ok",
+        "job": job,
+        "chunks": len(results),
+        "processed": sum(result["processed"] for result in results),
+        "written": sum(result["written"] for result in results),
+        "chunk_seconds_total": round(sum(chunk_seconds), 3),
+        "chunk_seconds_max": max(chunk_seconds, default=0.0),
+        "elapsed_seconds": round(time.time() - started_at, 3),
+    }
+    for key in ("recomputed", "decay_refreshed"):
+        if any(key in result for result in results):
+            summary[key] = sum(result.get(key, 0) for result in results)
+    return summary
+
+
+@shared_task
+def recompute_all_health_scores(window_days: int = 30, chunk_size=None, windows=None):
+    return _dispatch_health_chunks(recompute_health_chunk, "all", chunk_size, window_days=window_days, windows=windows)
+
+
+@shared_task
+def recompute_dirty_health_scores(window_days: int = 30, chunk_size=None):
+    return _dispatch_health_chunks(recompute_dirty_health_chunk, "dirty", chunk_size, window_days=window_days)
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def rollup_plant_health_history(self):
+    # each tier resumes from its own watermark; the first run backfills all history
+    daily = rollup_health_snapshots("daily")
+    weekly = rollup_health_snapshots("weekly")
+    pruned = prune_rolled_up_health_snapshots(getattr(settings, "HEALTH_SNAPSHOT_RAW_RETENTION_DAYS", 35))
+    return {"status": "ok", "daily": daily, "weekly": weekly, "pruned": pruned}
 
 
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
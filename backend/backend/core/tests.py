@@ -1,3 +1,479 @@
-from django.test import TestCase
+import random
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .health_scoring import (
+    HealthDataAggregator,
+    SEVERITY_MAP,
+    HealthScoringEngine,
+    compute_and_store_plant_health,
+    compute_and_store_plant_health_bulk,
+    rollup_health_snapshots,
+)
+from .models import (
+    BroadcastNotification,
+    BroadcastReadCursor,
+    CareLog,
+    DiseaseProfile,
+    Notification,
+    Plant,
+    PlantHealthSnapshot,
+    Prediction,
+    Reminder,
+    SmartReminderEvent,
+    WeatherSnapshot,
+)
+from .notifications import (
+    decode_notification_cursor,
+    encode_notification_cursor,
+    get_unread_count,
+    notify_user,
+    paginate_user_notifications,
+)
+from .smart_reminders import build_event, record_events
+from .tasks import queue_location_syncs, sync_weather_for_locations, weather_sync_lock_key
+from .weather_service import encode_geohash, fresh_snapshots_for_points
+
+COMPONENT_FIELDS = ("watering", "fertilizing", "disease", "growth", "missed")
+
+
+def seed_health_inputs(seed=7, plant_count=20):
+    """Plants with randomised care logs, predictions and reminders spread over ~100 days."""
+    rng = random.Random(seed)
+    now = timezone.now()
+    owner = User.objects.create_user(f"owner{seed}", password="pw")
+    stranger = User.objects.create_user(f"stranger{seed}", password="pw")
+    healthy = DiseaseProfile.objects.create(code="healthy", display_name="Healthy", treatment_recommendation="-")
+    blight = DiseaseProfile.objects.create(code="blight", display_name="Blight", treatment_recommendation="-")
+
+    plants = []
+    for index in range(plant_count):
+        plant = Plant.objects.create(
+            user=owner,
+            name=f"plant{index}",
+            watering_interval=rng.randint(1, 7),
+            dynamic_watering_interval=rng.randint(1, 7),
+            image_url="https://example.com/p.jpg" if index % 3 == 0 else None,
+            weather_opt_in=False,
+        )
+        plants.append(plant)
+
+        logs = CareLog.objects.bulk_create([
+            CareLog(user=owner, plant=plant, action=rng.choice(["Watered", "Fertilized", "Pruned"]))
+            for _ in range(rng.randint(0, 25))
+        ])
+        for log in logs:
+            CareLog.objects.filter(id=log.id).update(date=now - timedelta(days=rng.uniform(0, 100)))
+
+        for _ in range(rng.randint(0, 6)):
+            prediction = Prediction.objects.create(
+                # a stranger's prediction on this plant must not count
+                user=owner if rng.random() > 0.15 else stranger,
+                plant=plant,
+                image="predictions/test.jpg",
+                status=rng.choice(["done", "done", "done", "failed"]),
+                disease=rng.choice([healthy, blight, None]),
+                urgency_level=rng.choice(["low", "medium", "high", "critical", ""]),
+            )
+            Prediction.objects.filter(id=prediction.id).update(created_at=now - timedelta(days=rng.uniform(0, 100)))
+
+        for _ in range(rng.randint(0, 4)):
+            Reminder.objects.create(
+                plant=plant,
+                user=owner,
+                type="water",
+                frequency_days=rng.randint(0, 10),
+                next_run=now + timedelta(days=rng.uniform(-10, 10)),
+            )
+    return plants, now
+
+
+class HealthScoringParityTests(TestCase):
+    WINDOWS = [7, 30, 90]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.plants, cls.now = seed_health_inputs()
+
+    def assertSameComponents(self, expected, actual):
+        self.assertEqual(HealthScoringEngine.compute_score(expected), HealthScoringEngine.compute_score(actual))
+        for field in COMPONENT_FIELDS:
+            self.assertAlmostEqual(getattr(expected, field), getattr(actual, field), delta=1e-12, msg=field)
+
+    def test_multi_window_and_bulk_match_per_plant_scoring(self):
+        plants = list(Plant.objects.filter(id__in=[plant.id for plant in self.plants]).order_by("id"))
+        bulk = HealthScoringEngine.compute_components_bulk_multi(plants, self.WINDOWS, now=self.now)
+
+        for plant in plants:
+            multi = HealthScoringEngine.compute_components_multi(plant, self.WINDOWS, now=self.now)
+            for window_days in self.WINDOWS:
+                with self.subTest(plant=plant.name, window_days=window_days):
+                    expected = HealthScoringEngine.compute_components(plant, window_days, now=self.now)
+                    self.assertSameComponents(expected, multi[window_days])
+                    self.assertSameComponents(expected, bulk[plant.id][window_days])
+
+    def test_column_math_matches_scalar_formulas(self):
+        rng = random.Random(3)
+        now = self.now
+        urgencies = ["low", "medium", "high", "critical", ""]
+        predictions = [
+            (rng.randint(1, 7), now - timedelta(days=rng.uniform(0, 100)), rng.choice(urgencies))
+            for _ in range(200)
+        ]
+        reminders = [
+            (rng.randint(1, 7), rng.randint(0, 9), now + timedelta(days=rng.uniform(-10, 10)))
+            for _ in range(200)
+        ]
+
+        penalties = HealthDataAggregator.disease_penalties_from_columns(
+            np.asarray([plant_id for plant_id, _, _ in predictions], dtype=np.int64),
+            np.asarray([(now - created_at).total_seconds() / 86400.0 for _, created_at, _ in predictions]),
+            np.asarray([SEVERITY_MAP.get(urgency or "low", 0.2) for _, _, urgency in predictions]),
+            self.WINDOWS,
+        )
+        missed = HealthDataAggregator.missed_subscores_from_columns(
+            np.asarray([plant_id for plant_id, _, _ in reminders], dtype=np.int64),
+            np.asarray([frequency for _, frequency, _ in reminders], dtype=np.int64),
+            np.asarray([next_run < now - timedelta(days=1) for _, _, next_run in reminders]),
+            self.WINDOWS,
+        )
+
+        for plant_id in sorted({plant_id for plant_id, _, _ in predictions}):
+            for window_days in self.WINDOWS:
+                with self.subTest(plant_id=plant_id, window_days=window_days):
+                    since = now - timedelta(days=window_days)
+                    rows = [(created_at, urgency) for pid, created_at, urgency in predictions if pid == plant_id and created_at >= since]
+                    self.assertAlmostEqual(
+                        penalties[plant_id][window_days], HealthDataAggregator.disease_penalty(rows, now), delta=1e-12
+                    )
+
+        for plant_id in sorted({plant_id for plant_id, _, _ in reminders}):
+            rows = [(frequency, next_run) for pid, frequency, next_run in reminders if pid == plant_id]
+            for window_days in self.WINDOWS:
+                with self.subTest(plant_id=plant_id, window_days=window_days):
+                    self.assertAlmostEqual(
+                        missed[plant_id][window_days], HealthDataAggregator.score_missed(rows, window_days, now), delta=1e-12
+                    )
+
+
+class HealthSnapshotDedupTests(TestCase):
+    def setUp(self):
+        self.plants, _ = seed_health_inputs(seed=11, plant_count=4)
+
+    def test_unchanged_score_reuses_previous_snapshot(self):
+        plant = self.plants[0]
+        first = compute_and_store_plant_health(plant)
+        second = compute_and_store_plant_health(plant)
+
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(PlantHealthSnapshot.objects.filter(plant=plant).count(), 1)
+
+    def test_changed_inputs_store_a_new_snapshot(self):
+        plant = self.plants[0]
+        first = compute_and_store_plant_health(plant)
+        CareLog.objects.bulk_create([CareLog(user=plant.user, plant=plant, action="Watered") for _ in range(5)])
+        CareLog.objects.bulk_create([CareLog(user=plant.user, plant=plant, action="Fertilized") for _ in range(2)])
+        second = compute_and_store_plant_health(plant)
+
+        self.assertNotEqual(first.id, second.id)
+        self.assertEqual(PlantHealthSnapshot.objects.filter(plant=plant).count(), 2)
+
+    def test_bulk_store_skips_unchanged_plants(self):
+        created = compute_and_store_plant_health_bulk(self.plants, windows=[7, 30])
+        self.assertEqual(len(created), len(self.plants) * 2)
+
+        self.assertEqual(compute_and_store_plant_health_bulk(self.plants, windows=[7, 30]), [])
+        self.assertEqual(PlantHealthSnapshot.objects.count(), len(self.plants) * 2)
+
+
+class HealthHistoryViewTests(TestCase):
+    def setUp(self):
+        self.plants, _ = seed_health_inputs(seed=13, plant_count=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.plants[0].user)
+        self.url = f"/api/plants/{self.plants[0].id}/health-history/"
+
+    def store_snapshot(self, score, days_ago):
+        snapshot = PlantHealthSnapshot.objects.create(plant=self.plants[0], user=self.plants[0].user, score=score)
+        PlantHealthSnapshot.objects.filter(id=snapshot.id).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return snapshot
+
+    def test_recompute_is_visible_before_the_next_rollup(self):
+        compute_and_store_plant_health(self.plants[0])
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response["X-Health-History-Tier"], "daily")
+        self.assertEqual([row["bucket_start"] for row in response.data], [str(timezone.localdate())])
+
+    def test_rolled_up_buckets_are_merged_with_newer_snapshots(self):
+        self.store_snapshot(40, days_ago=5)
+        self.store_snapshot(60, days_ago=5)
+        self.store_snapshot(70, days_ago=3)
+        rollup_health_snapshots("daily")
+        self.store_snapshot(80, days_ago=3)
+        self.store_snapshot(90, days_ago=0)
+
+        rows = self.client.get(f"{self.url}?days=30").data
+
+        self.assertEqual(
+            [(row["bucket_start"], row["sample_count"], row["score"]) for row in rows],
+            [
+                (str(timezone.localdate() - timedelta(days=5)), 2, 50),
+                (str(timezone.localdate() - timedelta(days=3)), 2, 75),
+                (str(timezone.localdate()), 1, 90),
+            ],
+        )
+
+    def test_invalid_days_or_window_is_rejected(self):
+        for query in ("days=abc", "window=abc", "days=0", "window=400", "days=99999999"):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f"{self.url}?{query}").status_code, 400)
+
+
+class SmartEventRecordingTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user("grower", password="pw")
+        self.plant = Plant.objects.create(user=owner, name="basil", weather_opt_in=False)
+        self.now = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+
+    def record(self, event_type, reason, now, days_valid=1):
+        record_events([build_event(self.plant, event_type, "high", reason, now, days_valid)], now)
+
+    def test_ongoing_condition_extends_the_open_event(self):
+        self.record("heatwave_alert", "38C", self.now)
+        self.record("heatwave_alert", "39C", self.now + timedelta(hours=6), days_valid=2)
+
+        event = SmartReminderEvent.objects.get(plant=self.plant)
+        self.assertEqual(event.effective_to, self.now + timedelta(hours=6) + timedelta(days=2))
+        self.assertEqual(event.decision_reason, "39C")
+
+    def test_expired_event_in_the_same_window_is_upserted(self):
+        self.record("frost_warning", "1C", self.now - timedelta(hours=6), days_valid=0)
+        self.record("frost_warning", "0C", self.now)
+
+        event = SmartReminderEvent.objects.get(plant=self.plant)
+        self.assertEqual(event.effective_to, self.now + timedelta(days=1))
+        self.assertEqual(event.decision_reason, "0C")
+
+    def test_new_window_after_expiry_starts_a_new_event(self):
+        self.record("heatwave_alert", "38C", self.now)
+        self.record("heatwave_alert", "40C", self.now + timedelta(days=3))
+
+        self.assertEqual(SmartReminderEvent.objects.filter(plant=self.plant, event_type="heatwave_alert").count(), 2)
+
+    def test_events_outside_the_deduped_types_are_always_inserted(self):
+        self.record("interval_adjusted", "rain", self.now)
+        self.record("interval_adjusted", "rain", self.now + timedelta(minutes=5))
+
+        self.assertEqual(SmartReminderEvent.objects.filter(plant=self.plant).count(), 2)
+
+
+class NearbySnapshotReuseTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        # 400 cells about 20 km by 8 km apart, so no two share a snapshot within the radius
+        self.points = {
+            f"cell-{row}-{column}": (29.5 + row * 0.19, 34.3 + column * 0.08)
+            for row in range(20)
+            for column in range(20)
+        }
+
+    def store_snapshot(self, latitude, longitude):
+        return WeatherSnapshot.objects.create(
+            location_key=f"{latitude:.4f},{longitude:.4f}",
+            latitude=latitude,
+            longitude=longitude,
+            geohash=encode_geohash(latitude, longitude),
+            forecast_at=self.now,
+            expires_at=self.now + timedelta(hours=3),
+        )
+
+    @override_settings(WEATHER_SNAPSHOT_REUSE_RADIUS_KM=1.0)
+    def test_widely_spread_points_are_resolved_in_bounded_queries(self):
+        near = {}
+        for location_key, (latitude, longitude) in list(self.points.items())[:40]:
+            near[location_key] = self.store_snapshot(latitude + 0.005, longitude)
+        # too far from any point to be reused
+        self.store_snapshot(28.0, 33.0)
+
+        snapshots = fresh_snapshots_for_points(self.points, now=self.now)
+
+        self.assertEqual({key: snapshot.pk for key, snapshot in snapshots.items()},
+                         {key: snapshot.pk for key, snapshot in near.items()})
+
+    @override_settings(WEATHER_SNAPSHOT_REUSE_RADIUS_KM=1.0)
+    def test_expired_neighbours_are_not_reused(self):
+        location_key, (latitude, longitude) = next(iter(self.points.items()))
+        stale = self.store_snapshot(latitude + 0.005, longitude)
+        stale.expires_at = self.now - timedelta(minutes=1)
+        stale.save(update_fields=["expires_at"])
+
+        self.assertEqual(fresh_snapshots_for_points({location_key: (latitude, longitude)}, now=self.now), {})
+
+
+class WeatherSyncQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cells = {"32.08,34.78": {"latitude": 32.08, "longitude": 34.78, "plant_ids": []}}
+
+    @override_settings(CACHE_IS_SHARED=False)
+    def test_unshared_cache_queues_without_locking(self):
+        with mock.patch.object(sync_weather_for_locations, "apply_async") as apply_async:
+            self.assertEqual(queue_location_syncs(self.cells), 1)
+            self.assertEqual(queue_location_syncs(self.cells), 1)
+
+        self.assertEqual(apply_async.call_count, 2)
+        self.assertIsNone(cache.get(weather_sync_lock_key("32.08,34.78")))
+
+    @override_settings(CACHE_IS_SHARED=True)
+    def test_shared_cache_locks_queued_cells(self):
+        with mock.patch.object(sync_weather_for_locations, "apply_async") as apply_async:
+            self.assertEqual(queue_location_syncs(self.cells), 1)
+            self.assertEqual(queue_location_syncs(self.cells), 0)
+
+        self.assertEqual(apply_async.call_count, 1)
+
+
+class NotificationPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("reader", password="pw")
+        User.objects.filter(id=self.user.id).update(date_joined=timezone.now() - timedelta(days=30))
+        self.user.refresh_from_db()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_personal(self, created_at, count=1):
+        rows = Notification.objects.bulk_create(
+            [Notification(user=self.user, type="system", title=f"n{index}") for index in range(count)]
+        )
+        Notification.objects.filter(id__in=[row.id for row in rows]).update(created_at=created_at)
+        return rows
+
+    def create_broadcast(self, created_at, count=1):
+        rows = BroadcastNotification.objects.bulk_create(
+            [BroadcastNotification(audience_role="user", type="system", title=f"b{index}") for index in range(count)]
+        )
+        BroadcastNotification.objects.filter(id__in=[row.id for row in rows]).update(created_at=created_at)
+        return rows
+
+    def walk(self, limit):
+        ids, cursor = [], None
+        while True:
+            items, cursor = paginate_user_notifications(self.user, cursor, limit)
+            ids.extend(item["id"] for item in items)
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_ties_between_personal_and_broadcast_rows(self):
+        instant = timezone.now() - timedelta(days=1)
+        self.create_personal(instant, count=4)
+        self.create_broadcast(instant, count=3)
+        self.create_personal(instant - timedelta(minutes=1), count=2)
+        self.create_broadcast(instant + timedelta(minutes=1))
+
+        full, cursor = paginate_user_notifications(self.user, None, 100)
+        self.assertIsNone(cursor)
+        self.assertEqual(len(full), 10)
+
+        for limit in (1, 2, 3, 4, 7):
+            with self.subTest(limit=limit):
+                ids = self.walk(limit)
+                self.assertEqual(ids, [item["id"] for item in full])
+                self.assertEqual(len(set(ids)), len(ids))
+
+    def test_personal_rows_sort_ahead_of_broadcasts_in_the_same_instant(self):
+        instant = timezone.now() - timedelta(hours=1)
+        personal = self.create_personal(instant)
+        broadcast = self.create_broadcast(instant)
+
+        items, _ = paginate_user_notifications(self.user, None, 10)
+        self.assertEqual([item["id"] for item in items], [personal[0].id, f"broadcast-{broadcast[0].id}"])
+
+    def test_view_returns_next_cursor_header(self):
+        self.create_personal(timezone.now() - timedelta(hours=1), count=3)
+
+        response = self.client.get("/api/notifications/?limit=2")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+        cursor = response.headers["X-Next-Cursor"]
+
+        response = self.client.get(f"/api/notifications/?limit=2&cursor={cursor}")
+        self.assertEqual(len(response.json()), 1)
+        self.assertNotIn("X-Next-Cursor", response.headers)
+
+    def test_cursor_round_trips(self):
+        created_at = timezone.now()
+        cursor = encode_notification_cursor(created_at, "b", 42)
+        self.assertEqual(decode_notification_cursor(cursor), (created_at, "b", 42))
+
+    def test_invalid_cursor_is_rejected(self):
+        naive = encode_notification_cursor(timezone.now().replace(tzinfo=None), "n", 1)
+        unknown_kind = encode_notification_cursor(timezone.now(), "x", 1)
+        for cursor in ("zzz", "not-a-cursor!", naive, unknown_kind):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ValueError):
+                    paginate_user_notifications(self.user, cursor, 10)
+                self.assertEqual(self.client.get(f"/api/notifications/?cursor={cursor}").status_code, 400)
+
+    def test_invalid_limit_is_rejected(self):
+        self.assertEqual(self.client.get("/api/notifications/?limit=abc").status_code, 400)
+
+
+class UnreadCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("reader", password="pw")
+
+    def test_process_local_cache_counts_from_the_database(self):
+        self.assertEqual(get_unread_count(self.user), 0)
+        # a write that bypasses create_notifications, as a Celery worker's would from here
+        Notification.objects.create(user=self.user, type="system", title="hi")
+        self.assertEqual(get_unread_count(self.user), 1)
+
+    @override_settings(CACHE_IS_SHARED=True)
+    def test_shared_cache_follows_reads_and_creations(self):
+        notification = Notification.objects.create(user=self.user, type="system", title="hi")
+        self.assertEqual(get_unread_count(self.user), 1)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(f"/api/notifications/{notification.id}/read/")
+        self.assertEqual(get_unread_count(self.user), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_user(self.user, "system", "again")
+        self.assertEqual(get_unread_count(self.user), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post("/api/notifications/read-all/")
+        self.assertEqual(get_unread_count(self.user), 0)
+
+
+    def test_reading_broadcasts_does_not_create_a_read_cursor(self):
+        broadcast = BroadcastNotification.objects.create(audience_role="user", type="system", title="news")
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        self.assertEqual(get_unread_count(self.user), 1)
+        self.assertEqual(client.get("/api/notifications/").status_code, 200)
+        self.assertFalse(BroadcastReadCursor.objects.filter(user=self.user).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(f"/api/notifications/broadcast-{broadcast.id}/read/")
+        self.assertTrue(BroadcastReadCursor.objects.filter(user=self.user).exists())
+        self.assertEqual(get_unread_count(self.user), 0)
+
+
+class NotificationStreamTests(TestCase):
+    def test_wsgi_request_is_refused(self):
+        response = self.client.get("/api/notifications/stream/")
+        self.assertEqual(response.status_code, 501)
@@ -14,6 +14,9 @@ from . import assistant_views
 from .views import (
     list_notifications,
     mark_notification_read,
+    mark_broadcast_notification_read,
+    unread_notification_count,
+    notification_stream,
     mark_all_notifications_read,   # ✅ NEW
 
     list_expert_posts,
@@ -89,7 +92,10 @@ urlpatterns = [
     # Notifications
     # -------------------------
     path("notifications/", list_notifications),
+    path("notifications/unread-count/", unread_notification_count),
+    path("notifications/stream/", notification_stream),
     path("notifications/<int:notif_id>/read/", mark_notification_read),
+    path("notifications/broadcast-<int:broadcast_id>/read/", mark_broadcast_notification_read),
     path("notifications/read-all/", mark_all_notifications_read),  # ✅ NEW
 
     # -------------------------
@@ -128,9 +134,11 @@ urlpatterns = [
     # Smart Weather Reminders
     # -------------------------
     path("weather/evaluate/", weather_views.trigger_weather_evaluation),
+    path("weather/evaluate/stats/", weather_views.smart_evaluation_metrics),
     path("weather/plants/<int:plant_id>/sync/", weather_views.trigger_weather_sync_for_plant),
     path("weather/plants/<int:plant_id>/status/", weather_views.plant_weather_status),
     path("weather/forecast/", weather_views.get_forecast),
+    path("weather/forecast/stats/", weather_views.forecast_cache_stats),
 
     # -------------------------
     # Nearby Nurseries
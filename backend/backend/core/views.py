@@ -2,19 +2,19 @@ from rest_framework import generics
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth.models import User
 from rest_framework_simplejwt.views import TokenObtainPairView
-from .models import Plant, Notification, ExpertPost, ExpertInquiry, Prediction, DiseaseProfile, PlantHealthSnapshot, CommunityPost, CommunityPostLike, Profile, PlantGrowthEntry, PlantTimelapse
+from .models import Plant, ExpertPost, ExpertInquiry, Prediction, DiseaseProfile, PlantHealthSnapshot, CommunityPost, CommunityPostLike, Profile, PlantGrowthEntry, PlantTimelapse
 from .serializers import (
     UserSerializer,
     RoleAwareTokenObtainPairSerializer,
     AdminUserSerializer,
     PlantSerializer,
-    NotificationSerializer,
     ExpertPostSerializer,
     ExpertInquirySerializer,
     CommunityPostSerializer,
     PredictionCreateSerializer,
     PredictionSerializer,
     PlantHealthSnapshotSerializer,
+    PlantHealthRollupSerializer,
     PlantGrowthEntrySerializer,
     PlantTimelapseSerializer,
 )
@@ -37,13 +37,44 @@ from pathlib import Path
 from io import BytesIO
 from django.conf import settings
 from django.core.files.base import ContentFile
+from django.db import transaction
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from .permissions import IsExpert, IsAdmin
+from .notifications import (
+    get_unread_count,
+    mark_all_user_notifications_read,
+    mark_broadcast_read,
+    mark_personal_notification_read,
+    notify_user,
+    paginate_user_notifications,
+    publish_broadcast,
+    user_role,
+)
+from .notification_stream import role_target, stream_events, user_target
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from .inference import InferenceService, DEFAULT_DISEASES
-from .health_scoring import compute_and_store_plant_health
+from .health_scoring import (
+    DEFAULT_WINDOW_DAYS,
+    HealthScoringEngine,
+    cache_health_snapshots,
+    compute_and_store_plant_health,
+    get_cached_health_score,
+    health_history_tier,
+    health_rollup_history,
+    health_recompute_pending_key,
+    is_health_dirty,
+    provisional_health_score,
+)
+from django.core.cache import cache
+from .tasks import enqueue_task, fan_out_role_notifications, recompute_plant_health_score
 from .weather_service import WeatherAPIClient
 from PIL import Image, ImageOps
 
@@ -1131,20 +1162,82 @@ def add_suggested_plant(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def list_notifications(request):
-    qs = Notification.objects.filter(user=request.user)
-    return Response(NotificationSerializer(qs, many=True).data)
+    default_limit = getattr(settings, "NOTIFICATIONS_PAGE_SIZE", 50)
+    try:
+        limit = int(request.query_params.get("limit", default_limit))
+    except (TypeError, ValueError):
+        return Response({"detail": "limit must be an integer"}, status=400)
+    limit = max(1, min(limit, getattr(settings, "NOTIFICATIONS_MAX_PAGE_SIZE", 200)))
+
+    try:
+        items, next_cursor = paginate_user_notifications(request.user, request.query_params.get("cursor"), limit)
+    except ValueError:
+        return Response({"detail": "Invalid cursor"}, status=400)
+
+    # the body stays a plain list for existing clients; the next page is advertised in a header
+    response = Response(items)
+    if next_cursor:
+        response["X-Next-Cursor"] = next_cursor
+    return response
+
+
+async def notification_stream(request):
+    """Server-sent events carrying each new notification for the caller, in list-item shape.
+
+    Plain async view (DRF views are sync) so the connection is held by the
+    event loop rather than a worker thread; serve it from ``config.asgi``.
+    The access token comes from the Authorization header or, for EventSource
+    clients that cannot set headers, the ``token`` query parameter.
+    """
+    if request.method != "GET":
+        return JsonResponse({"detail": "Method not allowed"}, status=405)
+    if not isinstance(request, ASGIRequest):
+        # WSGI drains an async body before sending it, so an endless stream would pin the worker
+        return JsonResponse({"detail": "The notification stream needs an ASGI server (uvicorn config.asgi:application)."}, status=501)
+
+    header = request.headers.get("Authorization", "")
+    raw_token = header[7:].strip() if header.startswith("Bearer ") else request.GET.get("token", "")
+    if not raw_token:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    authenticator = JWTAuthentication()
+    try:
+        validated = authenticator.get_validated_token(raw_token)
+        user = await sync_to_async(authenticator.get_user)(validated)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return JsonResponse({"detail": "Given token not valid"}, status=401)
+
+    role = await sync_to_async(user_role)(user)
+    response = StreamingHttpResponse(
+        stream_events([user_target(user.id), role_target(role)]),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def unread_notification_count(request):
+    return Response({"unread": get_unread_count(request.user)})
+
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def mark_notification_read(request, notif_id):
-    try:
-        n = Notification.objects.get(id=notif_id, user=request.user)
-        n.is_read = True
-        n.save(update_fields=["is_read"])
-        return Response({"status": "ok"})
-    except Notification.DoesNotExist:
+    if not mark_personal_notification_read(request.user, notif_id):
         return Response({"detail": "Not found"}, status=404)
-    
+    return Response({"status": "ok"})
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def mark_broadcast_notification_read(request, broadcast_id):
+    if not mark_broadcast_read(request.user, broadcast_id):
+        return Response({"detail": "Not found"}, status=404)
+    return Response({"status": "ok"})
+
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -1161,11 +1254,47 @@ def plant_health_score(request, plant_id: int):
     except Plant.DoesNotExist:
         return Response({"detail": "Plant not found"}, status=404)
 
-    snapshot = plant.health_snapshots.order_by("-created_at").first()
-    if snapshot is None or request.GET.get("recompute") == "1":
-        snapshot = compute_and_store_plant_health(plant, window_days=30)
+    windows_raw = request.GET.get("windows")
+    windows = []
+    if windows_raw:
+        try:
+            windows = sorted({int(value) for value in windows_raw.split(",") if value.strip()})
+        except ValueError:
+            return Response({"detail": "windows must be a comma-separated list of days"}, status=400)
+        if not windows or len(windows) > 6 or windows[0] < 1 or windows[-1] > 365:
+            return Response({"detail": "windows must hold 1-6 values between 1 and 365"}, status=400)
+
+    if request.GET.get("recompute") == "1":
+        data = dict(PlantHealthSnapshotSerializer(compute_and_store_plant_health(plant, window_days=30)).data)
+    else:
+        data = get_cached_health_score(plant.id)
 
-    return Response(PlantHealthSnapshotSerializer(snapshot).data)
+    if data is None:
+        snapshot = plant.health_snapshots.filter(window_days=30).order_by("-created_at").first()
+        if snapshot is not None and not is_health_dirty(plant):
+            cache_health_snapshots([snapshot])
+            data = dict(PlantHealthSnapshotSerializer(snapshot).data)
+        else:
+            # cold or stale: recompute in the background and answer right away
+            try:
+                if cache.add(health_recompute_pending_key(plant.id), True, timeout=120):
+                    recompute_plant_health_score.delay(plant.id)
+                data = provisional_health_score(plant, stale_snapshot=snapshot)
+            except Exception:
+                cache.delete(health_recompute_pending_key(plant.id))
+                data = dict(PlantHealthSnapshotSerializer(compute_and_store_plant_health(plant, window_days=30)).data)
+
+    data.setdefault("provisional", False)
+    if windows:
+        components_by_window = HealthScoringEngine.compute_components_multi(plant, windows)
+        data["windows"] = {
+            str(window_days): {
+                "score": HealthScoringEngine.compute_score(components),
+                "components": {name: round(value, 4) for name, value in vars(components).items()},
+            }
+            for window_days, components in components_by_window.items()
+        }
+    return Response(data)
 
 
 @api_view(["GET"])
@@ -1176,10 +1305,26 @@ def plant_health_history(request, plant_id: int):
     except Plant.DoesNotExist:
         return Response({"detail": "Plant not found"}, status=404)
 
-    days = int(request.GET.get("days", 90))
+    try:
+        days = int(request.GET.get("days", 90))
+        # one scoring window per series; recomputes may store several windows side by side
+        window_days = int(request.GET.get("window", DEFAULT_WINDOW_DAYS))
+    except ValueError:
+        return Response({"detail": "days and window must be whole numbers of days"}, status=400)
+    if not 1 <= days <= 3650 or not 1 <= window_days <= 365:
+        return Response({"detail": "days must be between 1 and 3650 and window between 1 and 365"}, status=400)
     since = timezone.now() - timedelta(days=days)
-    snapshots = PlantHealthSnapshot.objects.filter(plant=plant, created_at__gte=since).order_by("created_at")
-    return Response(PlantHealthSnapshotSerializer(snapshots, many=True).data)
+    tier = request.GET.get("tier") or health_history_tier(days)
+
+    if tier == "daily" or tier == "weekly":
+        bucket_since = timezone.localdate(since)
+        if tier == "weekly":
+            bucket_since -= timedelta(days=bucket_since.weekday())
+        rollups = health_rollup_history(tier, plant, window_days, bucket_since)
+        return Response(PlantHealthRollupSerializer(rollups, many=True).data, headers={"X-Health-History-Tier": tier})
+
+    snapshots = PlantHealthSnapshot.objects.filter(plant=plant, window_days=window_days, created_at__gte=since).order_by("created_at")
+    return Response(PlantHealthSnapshotSerializer(snapshots, many=True).data, headers={"X-Health-History-Tier": "raw"})
 
 
 @api_view(["POST"])
@@ -1286,18 +1431,14 @@ def create_expert_post(request):
         image_url=s.validated_data.get("image_url"),
     )
 
-    # create notifications for normal users (you can expand later: followers)
-    users = User.objects.filter(profile__role="user")
-    Notification.objects.bulk_create([
-        Notification(
-            user=u,
-            type="new_expert_post",
-            title="New expert tip 🌿",
-            body=post.title,
-            data={"post_id": post.id},
-        )
-        for u in users
-    ])
+    # one broadcast row; each normal user's copy is resolved when they read notifications
+    publish_broadcast(
+        audience_role="user",
+        type="new_expert_post",
+        title="New expert tip 🌿",
+        body=post.title,
+        data={"post_id": post.id},
+    )
 
     return Response(ExpertPostSerializer(post, context={"request": request}).data, status=201)
 
@@ -1321,18 +1462,18 @@ def ask_expert(request):
         status="open",
     )
 
-    # notify experts
-    experts = User.objects.filter(profile__role__in=["expert", "admin"])
-    Notification.objects.bulk_create([
-        Notification(
-            user=e,
-            type="system",
-            title="New question from a user 💬",
-            body=(f"{plant_name + ' - ' if plant_name else ''}{question}")[:180],
-            data={"inquiry_id": inquiry.id},
+    # notify experts from a worker once the inquiry row is committed
+    body = (f"{plant_name + ' - ' if plant_name else ''}{question}")[:180]
+    transaction.on_commit(
+        lambda: enqueue_task(
+            fan_out_role_notifications,
+            ["expert", "admin"],
+            "system",
+            "New question from a user 💬",
+            body,
+            {"inquiry_id": inquiry.id},
         )
-        for e in experts
-    ])
+    )
 
     return Response({"status": "created", "inquiry_id": inquiry.id}, status=201)
 
@@ -1392,8 +1533,8 @@ def answer_inquiry(request, inquiry_id: int):
     )
 
     # notify user who asked
-    Notification.objects.create(
-        user=inquiry.user,
+    notify_user(
+        inquiry.user,
         type="expert_reply",
         title="Expert replied 🌿",
         body=answer[:180],
@@ -1406,7 +1547,7 @@ def answer_inquiry(request, inquiry_id: int):
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def mark_all_notifications_read(request):
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    mark_all_user_notifications_read(request.user)
     return Response({"status": "ok"})
 
 
@@ -1,12 +1,28 @@
 from __future__ import annotations
 
+import math
+import threading
+import time
+import zlib
+from collections import OrderedDict
 from dataclasses import dataclass
-from datetime import timedelta
-from typing import Optional, Dict, Any
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Iterable, List, Sequence, Tuple
 
 import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import Signal
+from django.db.models import F, Max, Q, Window
+from django.db.models.functions import RowNumber
 from django.utils import timezone
 
+from .models import GeocodeCacheEntry, Plant, WeatherLocationCell, WeatherSnapshot
+
+
+# Sent with ``snapshots=[...]`` whenever new forecasts are persisted.
+weather_snapshots_stored = Signal()
+
 
 @dataclass
 class Coordinates:
@@ -21,9 +37,43 @@ class WeatherAPIClient:
 
     @classmethod
     def geocode_location(cls, location_text: str) -> Optional[Coordinates]:
-        if not location_text:
+        query = normalize_location_text(location_text)
+        if not query:
             return None
 
+        now = timezone.now()
+        hit, coords = _geocode_memory.get(query, now)
+        if hit:
+            return coords
+
+        entry = GeocodeCacheEntry.objects.filter(query=query, expires_at__gt=now).first()
+        if entry is not None:
+            coords = geocode_entry_coordinates(entry)
+            _geocode_memory.put(query, coords, entry.expires_at)
+            return coords
+
+        coords = cls.geocode_location_remote(location_text)
+        if coords is not None:
+            expires_at = now + timedelta(days=getattr(settings, "WEATHER_GEOCODE_CACHE_TTL_DAYS", 90))
+        else:
+            expires_at = now + timedelta(hours=getattr(settings, "WEATHER_GEOCODE_NEGATIVE_TTL_HOURS", 24))
+
+        GeocodeCacheEntry.objects.update_or_create(
+            query=query,
+            defaults={
+                "found": coords is not None,
+                "latitude": coords.latitude if coords else None,
+                "longitude": coords.longitude if coords else None,
+                "timezone": coords.timezone if coords else "",
+                "resolved_at": now,
+                "expires_at": expires_at,
+            },
+        )
+        _geocode_memory.put(query, coords, expires_at)
+        return coords
+
+    @classmethod
+    def geocode_location_remote(cls, location_text: str) -> Optional[Coordinates]:
         response = requests.get(
             cls.GEOCODE_URL,
             params={"name": location_text, "count": 1, "language": "en", "format": "json"},
@@ -44,46 +94,548 @@ class WeatherAPIClient:
 
     @classmethod
     def fetch_forecast_summary(cls, latitude: float, longitude: float, timezone_name: str = "auto") -> Dict[str, Any]:
+        return cls.fetch_forecast_summaries([(latitude, longitude, timezone_name)])[0]
+
+    @classmethod
+    def fetch_forecast_summaries(cls, points: Sequence[Tuple[float, float, str]]) -> List[Dict[str, Any]]:
+        """One request for many (latitude, longitude, timezone) points; summaries come back in input order."""
+        if not points:
+            return []
+
         response = requests.get(
             cls.FORECAST_URL,
             params={
-                "latitude": latitude,
-                "longitude": longitude,
-                "timezone": timezone_name or "auto",
+                "latitude": ",".join(str(latitude) for latitude, _, _ in points),
+                "longitude": ",".join(str(longitude) for _, longitude, _ in points),
+                "timezone": ",".join(timezone_name or "auto" for _, _, timezone_name in points),
                 "forecast_days": 3,
                 "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum,precipitation_probability_max",
             },
-            timeout=10,
+            timeout=10 + len(points) // 10,
         )
         response.raise_for_status()
-        payload = response.json()
+        payloads = response.json()
+        # open-meteo answers a single point with an object and several points with a list
+        if isinstance(payloads, dict):
+            payloads = [payloads]
+        if len(payloads) != len(points):
+            raise ValueError(f"open-meteo returned {len(payloads)} forecasts for {len(points)} points")
 
-        daily = payload.get("daily") or {}
-        tmax = daily.get("temperature_2m_max") or []
-        tmin = daily.get("temperature_2m_min") or []
-        rain_mm = daily.get("precipitation_sum") or []
-        rain_prob = daily.get("precipitation_probability_max") or []
-
-        next24h_rain_mm_sum = float(rain_mm[0]) if len(rain_mm) >= 1 and rain_mm[0] is not None else 0.0
-        next24h_rain_prob_max = float(rain_prob[0] or 0.0) / 100.0 if len(rain_prob) >= 1 else 0.0
-
-        next48h_temp_max = max([float(v) for v in tmax[:2] if v is not None], default=0.0)
-        next48h_temp_min = min([float(v) for v in tmin[:2] if v is not None], default=0.0)
-
-        return {
-            "provider": "open-meteo",
-            "timezone": payload.get("timezone") or timezone_name or "UTC",
-            "next24h_rain_prob_max": next24h_rain_prob_max,
-            "next24h_rain_mm_sum": next24h_rain_mm_sum,
-            "next48h_temp_max": next48h_temp_max,
-            "next48h_temp_min": next48h_temp_min,
-            "frost_risk": next48h_temp_min <= 2.0,
-            "heatwave_risk": next48h_temp_max >= 35.0,
-            "payload": payload,
-            "forecast_at": timezone.now(),
-            "expires_at": timezone.now() + timedelta(hours=6),
-        }
+        return [summarize_forecast_payload(payload, timezone_name) for payload, (_, _, timezone_name) in zip(payloads, points)]
+
+
+FORECAST_DAILY_FIELDS = (
+    "time",
+    "temperature_2m_max",
+    "temperature_2m_min",
+    "precipitation_sum",
+    "precipitation_probability_max",
+)
+
+
+def compact_forecast_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only what forecast_days_from_payload reads; units and request metadata are dropped."""
+    daily = payload.get("daily") or {}
+    return {
+        "timezone": payload.get("timezone"),
+        "daily": {field: daily.get(field) or [] for field in FORECAST_DAILY_FIELDS},
+    }
+
+
+def summarize_forecast_payload(payload: Dict[str, Any], timezone_name: str = "auto") -> Dict[str, Any]:
+    daily = payload.get("daily") or {}
+    tmax = daily.get("temperature_2m_max") or []
+    tmin = daily.get("temperature_2m_min") or []
+    rain_mm = daily.get("precipitation_sum") or []
+    rain_prob = daily.get("precipitation_probability_max") or []
+
+    next24h_rain_mm_sum = float(rain_mm[0]) if len(rain_mm) >= 1 and rain_mm[0] is not None else 0.0
+    next24h_rain_prob_max = float(rain_prob[0] or 0.0) / 100.0 if len(rain_prob) >= 1 else 0.0
+
+    next48h_temp_max = max([float(v) for v in tmax[:2] if v is not None], default=0.0)
+    next48h_temp_min = min([float(v) for v in tmin[:2] if v is not None], default=0.0)
+
+    return {
+        "provider": "open-meteo",
+        "timezone": payload.get("timezone") or timezone_name or "UTC",
+        "next24h_rain_prob_max": next24h_rain_prob_max,
+        "next24h_rain_mm_sum": next24h_rain_mm_sum,
+        "next48h_temp_max": next48h_temp_max,
+        "next48h_temp_min": next48h_temp_min,
+        "frost_risk": next48h_temp_min <= getattr(settings, "WEATHER_FROST_THRESHOLD_C", 2.0),
+        "heatwave_risk": next48h_temp_max >= getattr(settings, "WEATHER_HEATWAVE_THRESHOLD_C", 35.0),
+        "payload": compact_forecast_payload(payload),
+        "forecast_at": timezone.now(),
+        "expires_at": timezone.now() + timedelta(hours=6),
+    }
+
+
+class GeocodeMemoryCache:
+    """Small in-process LRU in front of GeocodeCacheEntry; entries keep the row's expiry."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[Optional[Coordinates], datetime]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query: str, now: datetime) -> Tuple[bool, Optional[Coordinates]]:
+        with self._lock:
+            cached = self._entries.get(query)
+            if cached is None:
+                return False, None
+            coords, expires_at = cached
+            if expires_at <= now:
+                del self._entries[query]
+                return False, None
+            self._entries.move_to_end(query)
+            return True, coords
+
+    def put(self, query: str, coords: Optional[Coordinates], expires_at: datetime) -> None:
+        with self._lock:
+            self._entries[query] = (coords, expires_at)
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_geocode_memory = GeocodeMemoryCache(getattr(settings, "WEATHER_GEOCODE_MEMORY_SIZE", 1024))
+
+
+def normalize_location_text(location_text: Optional[str]) -> str:
+    return " ".join((location_text or "").split()).casefold()[:160]
+
+
+def geocode_entry_coordinates(entry: GeocodeCacheEntry) -> Optional[Coordinates]:
+    if not entry.found:
+        return None
+    return Coordinates(latitude=entry.latitude, longitude=entry.longitude, timezone=entry.timezone or "UTC")
 
 
 def build_location_key(latitude: float, longitude: float) -> str:
     return f"{round(latitude, 2)}:{round(longitude, 2)}"
+
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9
+# prefixes per candidate query: each one adds a range to the WHERE clause, and SQLite caps expression depth
+GEOHASH_PREFIX_BATCH_SIZE = 50
+EARTH_RADIUS_KM = 6371.0
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """(latitude, longitude) size in degrees of a geohash cell at the given precision."""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lon_bits)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def geohash_search_prefixes(latitude: float, longitude: float, radius_km: float) -> List[str]:
+    """Prefixes of the geohash cell containing the point and its eight neighbours.
+
+    The precision is the finest one whose cells are still at least ``radius_km`` across, so every
+    point within the radius falls inside one of the nine cells.
+    """
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        lat_size, lon_size = geohash_cell_size(candidate)
+        height_km = lat_size * 110.57
+        width_km = lon_size * 111.32 * max(math.cos(math.radians(min(abs(latitude) + lat_size, 89.9))), 1e-6)
+        if height_km >= radius_km and width_km >= radius_km:
+            precision = candidate
+            break
+
+    lat_size, lon_size = geohash_cell_size(precision)
+    prefixes = set()
+    for dlat in (-lat_size, 0.0, lat_size):
+        for dlon in (-lon_size, 0.0, lon_size):
+            neighbour_lat = max(-90.0, min(90.0, latitude + dlat))
+            neighbour_lon = (longitude + dlon + 180.0) % 360.0 - 180.0
+            prefixes.add(encode_geohash(neighbour_lat, neighbour_lon, precision))
+    return sorted(prefixes)
+
+
+def fresh_snapshots_by_location(location_keys: Iterable[str], now=None) -> Dict[str, WeatherSnapshot]:
+    location_keys = set(location_keys)
+    if not location_keys:
+        return {}
+
+    ranked = (
+        WeatherSnapshot.objects.filter(location_key__in=location_keys, expires_at__gte=now or timezone.now())
+        .annotate(
+            freshness_rank=Window(
+                expression=RowNumber(),
+                partition_by=[F("location_key")],
+                order_by=F("forecast_at").desc(),
+            )
+        )
+        .filter(freshness_rank=1)
+    )
+    return {snapshot.location_key: snapshot for snapshot in ranked}
+
+
+def nearby_fresh_snapshots(points: Dict[str, Tuple[float, float]], radius_km: float, now=None) -> Dict[str, WeatherSnapshot]:
+    """Closest unexpired snapshot within ``radius_km`` of each point, via batched geohash prefix range queries."""
+    if not points or radius_km <= 0:
+        return {}
+
+    prefixes_by_key = {
+        location_key: geohash_search_prefixes(latitude, longitude, radius_km)
+        for location_key, (latitude, longitude) in points.items()
+    }
+    # neighbouring points share most of their cells; query each prefix once
+    search_prefixes = sorted({prefix for prefixes in prefixes_by_key.values() for prefix in prefixes})
+    candidates: Dict[int, WeatherSnapshot] = {}
+    for start in range(0, len(search_prefixes), GEOHASH_PREFIX_BATCH_SIZE):
+        prefix_filter = Q()
+        for prefix in search_prefixes[start:start + GEOHASH_PREFIX_BATCH_SIZE]:
+            # a half-open range rather than startswith, whose LIKE cannot use the geohash index
+            prefix_filter |= Q(geohash__gte=prefix, geohash__lt=prefix + "~")
+        batch = WeatherSnapshot.objects.filter(prefix_filter, expires_at__gte=now or timezone.now()).exclude(geohash="")
+        # precision varies with latitude, so a prefix from one point may nest inside another's
+        candidates.update((snapshot.pk, snapshot) for snapshot in batch)
+    ranked = sorted(candidates.values(), key=lambda snapshot: snapshot.forecast_at, reverse=True)
+
+    nearest: Dict[str, WeatherSnapshot] = {}
+    for location_key, (latitude, longitude) in points.items():
+        prefixes = tuple(prefixes_by_key[location_key])
+        best_distance = radius_km
+        for snapshot in ranked:
+            if not snapshot.geohash.startswith(prefixes):
+                continue
+            distance = haversine_km(latitude, longitude, snapshot.latitude, snapshot.longitude)
+            # candidates are newest first, so ties keep the freshest forecast
+            if distance < best_distance or (distance == best_distance and location_key not in nearest):
+                nearest[location_key] = snapshot
+                best_distance = distance
+    return nearest
+
+
+def fresh_snapshots_for_points(points: Dict[str, Tuple[float, float]], now=None) -> Dict[str, WeatherSnapshot]:
+    """Exact-cell snapshots first; cells without one may reuse a neighbour within WEATHER_SNAPSHOT_REUSE_RADIUS_KM."""
+    snapshots = fresh_snapshots_by_location(points, now=now)
+    missing = {location_key: point for location_key, point in points.items() if location_key not in snapshots}
+    radius_km = getattr(settings, "WEATHER_SNAPSHOT_REUSE_RADIUS_KM", 0.0)
+    snapshots.update(nearby_fresh_snapshots(missing, radius_km, now=now))
+    return snapshots
+
+
+def plants_near_snapshots(snapshots: Sequence[WeatherSnapshot]):
+    """Opted-in plants that could be served by any of the snapshots: their own cell or the reuse radius."""
+    # a cell is 0.01° across, so its plants can sit ~1.6 km from the point that was fetched
+    reach_km = getattr(settings, "WEATHER_SNAPSHOT_REUSE_RADIUS_KM", 0.0) + 1.6
+    area = Q()
+    for snapshot in snapshots:
+        lat_delta = reach_km / 110.57
+        lon_delta = reach_km / (111.32 * max(math.cos(math.radians(min(abs(snapshot.latitude) + lat_delta, 89.9))), 1e-6))
+        area |= Q(
+            latitude__range=(snapshot.latitude - lat_delta, snapshot.latitude + lat_delta),
+            longitude__range=(snapshot.longitude - lon_delta, snapshot.longitude + lon_delta),
+        )
+    if not area:
+        return Plant.objects.none()
+    return Plant.objects.filter(area, weather_opt_in=True)
+
+
+def store_forecast_snapshot(location_key: str, latitude: float, longitude: float, summary: Dict[str, Any]) -> WeatherSnapshot:
+    snapshot = build_forecast_snapshot(location_key, latitude, longitude, summary)
+    snapshot.save()
+    weather_snapshots_stored.send(sender=WeatherSnapshot, snapshots=[snapshot])
+    return snapshot
+
+
+def build_forecast_snapshot(location_key: str, latitude: float, longitude: float, summary: Dict[str, Any]) -> WeatherSnapshot:
+    return WeatherSnapshot(
+        location_key=location_key,
+        latitude=latitude,
+        longitude=longitude,
+        geohash=encode_geohash(latitude, longitude),
+        timezone=summary["timezone"],
+        next24h_rain_prob_max=summary["next24h_rain_prob_max"],
+        next24h_rain_mm_sum=summary["next24h_rain_mm_sum"],
+        next48h_temp_max=summary["next48h_temp_max"],
+        next48h_temp_min=summary["next48h_temp_min"],
+        frost_risk=summary["frost_risk"],
+        heatwave_risk=summary["heatwave_risk"],
+        provider=summary["provider"],
+        payload=summary["payload"],
+        forecast_at=summary["forecast_at"],
+        expires_at=summary["expires_at"],
+    )
+
+
+def prune_expired_weather_snapshots(retention_hours: int) -> int:
+    """Delete snapshots expired longer than the horizon; the newest row per location key always stays."""
+    cutoff = timezone.now() - timedelta(hours=retention_hours)
+    latest_ids = (
+        WeatherSnapshot.objects.values("location_key")
+        .annotate(latest_id=Max("id"))
+        .values("latest_id")
+    )
+    deleted, _ = WeatherSnapshot.objects.filter(expires_at__lt=cutoff).exclude(id__in=latest_ids).delete()
+    return deleted
+
+
+# A fixed pool of striped locks: location keys come from request coordinates,
+# so one lock per key would grow without bound. Keys sharing a stripe only
+# serialise their (rare) concurrent misses.
+FORECAST_FETCH_LOCK_STRIPES = 64
+_forecast_fetch_locks = [threading.Lock() for _ in range(FORECAST_FETCH_LOCK_STRIPES)]
+
+
+def forecast_fetch_lock_key(location_key: str) -> str:
+    return f"weather_forecast_fetch:{location_key}"
+
+
+def _local_forecast_lock(location_key: str) -> threading.Lock:
+    return _forecast_fetch_locks[zlib.crc32(location_key.encode()) % FORECAST_FETCH_LOCK_STRIPES]
+
+
+def _fetch_and_store(location_key: str, latitude: float, longitude: float, timezone_name: str) -> WeatherSnapshot:
+    summary = WeatherAPIClient.fetch_forecast_summary(latitude, longitude, timezone_name or "auto")
+    return store_forecast_snapshot(location_key, latitude, longitude, summary)
+
+
+def fetch_or_reuse_snapshot(location_key: str, latitude: float, longitude: float, timezone_name: str = "auto", fresh_until=None):
+    """Return (snapshot, fetched); concurrent misses for one location share a single upstream call.
+
+    ``fresh_until`` makes snapshots expiring before that moment count as misses (refresh-ahead).
+    """
+    point = {location_key: (latitude, longitude)}
+    snapshot = fresh_snapshots_for_points(point, fresh_until).get(location_key)
+    if snapshot is not None:
+        return snapshot, False
+
+    # Threads in this process queue on a local lock; other processes on a cache
+    # lock, which only spans processes when the cache is shared (Redis).
+    with _local_forecast_lock(location_key):
+        snapshot = fresh_snapshots_for_points(point, fresh_until).get(location_key)
+        if snapshot is not None:
+            return snapshot, False
+
+        lock_key = forecast_fetch_lock_key(location_key)
+        wait_seconds = getattr(settings, "WEATHER_FORECAST_FETCH_WAIT_SECONDS", 10)
+        if cache.add(lock_key, True, timeout=wait_seconds * 3):
+            try:
+                return _fetch_and_store(location_key, latitude, longitude, timezone_name), True
+            finally:
+                cache.delete(lock_key)
+
+        deadline = time.monotonic() + wait_seconds
+        while time.monotonic() < deadline:
+            time.sleep(0.2)
+            snapshot = fresh_snapshots_for_points(point, fresh_until).get(location_key)
+            if snapshot is not None:
+                return snapshot, False
+
+        # The other fetcher failed or stalled; fall back to our own call.
+        return _fetch_and_store(location_key, latitude, longitude, timezone_name), True
+
+
+def fetch_or_reuse_snapshots(cells: Dict[str, Dict[str, Any]], fresh_until=None) -> Dict[str, Tuple[WeatherSnapshot, bool]]:
+    """Batch variant of fetch_or_reuse_snapshot for ``{location_key: {latitude, longitude, timezone_name}}``.
+
+    Missing cells are fetched WEATHER_BATCH_MAX_POINTS at a time. Callers are expected to hold the
+    per-cell sync locks, so there is no extra request coalescing here.
+    """
+    reused = fresh_snapshots_for_points(
+        {location_key: (cell["latitude"], cell["longitude"]) for location_key, cell in cells.items()},
+        now=fresh_until,
+    )
+    results = {key: (snapshot, False) for key, snapshot in reused.items()}
+
+    # Missing cells close to another missing cell share its fetch instead of making their own.
+    radius_km = getattr(settings, "WEATHER_SNAPSHOT_REUSE_RADIUS_KM", 0.0)
+    missing = []
+    anchors: Dict[str, str] = {}
+    for key in cells:
+        if key in reused:
+            continue
+        latitude, longitude = cells[key]["latitude"], cells[key]["longitude"]
+        anchor = None
+        if radius_km > 0:
+            anchor = next(
+                (
+                    other for other in missing
+                    if haversine_km(latitude, longitude, cells[other]["latitude"], cells[other]["longitude"]) <= radius_km
+                ),
+                None,
+            )
+        if anchor is None:
+            missing.append(key)
+        else:
+            anchors[key] = anchor
+
+    batch_size = max(1, getattr(settings, "WEATHER_BATCH_MAX_POINTS", 50))
+    for start in range(0, len(missing), batch_size):
+        keys = missing[start:start + batch_size]
+        points = [
+            (cells[key]["latitude"], cells[key]["longitude"], cells[key].get("timezone_name") or "auto")
+            for key in keys
+        ]
+        summaries = WeatherAPIClient.fetch_forecast_summaries(points)
+        snapshots = WeatherSnapshot.objects.bulk_create([
+            build_forecast_snapshot(key, latitude, longitude, summary)
+            for key, (latitude, longitude, _), summary in zip(keys, points, summaries)
+        ])
+        results.update({snapshot.location_key: (snapshot, True) for snapshot in snapshots})
+        weather_snapshots_stored.send(sender=WeatherSnapshot, snapshots=snapshots)
+
+    for key, anchor in anchors.items():
+        results[key] = (results[anchor][0], False)
+    return results
+
+
+def touch_location_cell(location_key: str, latitude: float, longitude: float, timezone_name: str = "") -> None:
+    """Mark a cell as requested by a user; writes are throttled per cell."""
+    interval = getattr(settings, "WEATHER_CELL_TOUCH_INTERVAL_SECONDS", 600)
+    if not cache.add(f"weather_cell_touch:{location_key}", True, timeout=interval):
+        return
+
+    WeatherLocationCell.objects.update_or_create(
+        location_key=location_key,
+        defaults={
+            "latitude": latitude,
+            "longitude": longitude,
+            "timezone": timezone_name or "",
+            "last_requested_at": timezone.now(),
+        },
+    )
+
+
+def active_location_cells(now=None) -> Dict[str, Dict[str, Any]]:
+    """Cells with opted-in plants or a recent forecast request, keyed by location key."""
+    now = now or timezone.now()
+    cells: Dict[str, Dict[str, Any]] = {}
+
+    plant_points = (
+        Plant.objects.filter(weather_opt_in=True, latitude__isnull=False, longitude__isnull=False)
+        .values_list("latitude", "longitude", "location_timezone")
+        .order_by("id")
+    )
+    for latitude, longitude, timezone_name in plant_points.iterator():
+        cells.setdefault(
+            build_location_key(latitude, longitude),
+            {"latitude": latitude, "longitude": longitude, "timezone_name": timezone_name or "auto"},
+        )
+
+    active_since = now - timedelta(hours=getattr(settings, "WEATHER_PREFETCH_ACTIVE_HOURS", 48))
+    for cell in WeatherLocationCell.objects.filter(last_requested_at__gte=active_since):
+        cells.setdefault(
+            cell.location_key,
+            {"latitude": cell.latitude, "longitude": cell.longitude, "timezone_name": cell.timezone or "auto"},
+        )
+    return cells
+
+
+HOURLY_COUNTER_RETENTION_HOURS = 7 * 24
+
+
+def hourly_counters_available() -> bool:
+    # counters are bumped in Celery workers and read by the web process, so
+    # they are only meaningful when every process shares the cache
+    return getattr(settings, "CACHE_IS_SHARED", False)
+
+
+def hourly_counter_key(name: str, bucket: datetime, label: str) -> str:
+    return f"{name}:{bucket:%Y%m%d%H}:{label}"
+
+
+def increment_hourly_counter(name: str, label: str, amount: int = 1) -> None:
+    if amount <= 0:
+        return
+    key = hourly_counter_key(name, timezone.now(), label)
+    cache.add(key, 0, timeout=HOURLY_COUNTER_RETENTION_HOURS * 60 * 60)
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # evicted between add and incr; losing one sample is fine
+        pass
+
+
+def hourly_counter_series(name: str, labels: Sequence[str], hours: int) -> List[Dict[str, Any]]:
+    """Per-hour counts for each label, oldest hour first."""
+    now = timezone.now()
+    buckets = [now - timedelta(hours=offset) for offset in range(hours - 1, -1, -1)]
+    counts = cache.get_many([hourly_counter_key(name, bucket, label) for bucket in buckets for label in labels])
+    return [
+        {
+            "hour": bucket.replace(minute=0, second=0, microsecond=0).isoformat(),
+            **{label: counts.get(hourly_counter_key(name, bucket, label), 0) for label in labels},
+        }
+        for bucket in buckets
+    ]
+
+
+def record_forecast_lookup(hit: bool) -> None:
+    increment_hourly_counter("weather_forecast_stats", "hit" if hit else "miss")
+
+
+def forecast_lookup_stats(hours: int = 24) -> Dict[str, Any]:
+    series = hourly_counter_series("weather_forecast_stats", ("hit", "miss"), hours)
+    hits = sum(row["hit"] for row in series)
+    misses = sum(row["miss"] for row in series)
+    total = hits + misses
+    return {
+        "hours": hours,
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
+
+
+def forecast_days_from_payload(payload: Dict[str, Any], days: int = 3) -> List[Dict[str, Any]]:
+    daily = (payload or {}).get("daily", {})
+    dates = daily.get("time", [])
+    tmax = daily.get("temperature_2m_max", [])
+    tmin = daily.get("temperature_2m_min", [])
+    rain_sum = daily.get("precipitation_sum", [])
+    rain_prob = daily.get("precipitation_probability_max", [])
+
+    return [
+        {
+            "date": dates[i],
+            "temp_max": tmax[i] if i < len(tmax) else None,
+            "temp_min": tmin[i] if i < len(tmin) else None,
+            "precipitation_sum": rain_sum[i] if i < len(rain_sum) else 0,
+            "precipitation_probability": rain_prob[i] if i < len(rain_prob) else 0,
+        }
+        for i in range(min(days, len(dates)))
+    ]
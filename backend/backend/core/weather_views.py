@@ -1,13 +1,26 @@
-from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
+
+from .permissions import IsAdmin
 from rest_framework.response import Response
 
 from .models import Plant, WeatherSnapshot, SmartReminderEvent
 from .serializers import WeatherSnapshotSerializer, SmartReminderEventSerializer
-from .smart_reminders import apply_weather_to_plant_reminders
+from .smart_reminders import apply_weather_to_plant_reminders, smart_evaluation_stats
 from .tasks import sync_weather_snapshot_for_plant, evaluate_smart_reminders
-from .weather_service import build_location_key, WeatherAPIClient
+from .weather_service import (
+    HOURLY_COUNTER_RETENTION_HOURS,
+    WeatherAPIClient,
+    active_location_cells,
+    build_location_key,
+    fetch_or_reuse_snapshot,
+    forecast_days_from_payload,
+    forecast_lookup_stats,
+    fresh_snapshots_for_points,
+    hourly_counters_available,
+    record_forecast_lookup,
+    touch_location_cell,
+)
 
 
 @api_view(["POST"])
@@ -46,18 +59,21 @@ def plant_weather_status(request, plant_id: int):
         return Response({"detail": "Plant not found"}, status=404)
 
     snapshot = None
+    fresh_snapshot = None
     if plant.latitude is not None and plant.longitude is not None:
         location_key = build_location_key(plant.latitude, plant.longitude)
-        snapshot = (
+        # same lookup as the evaluators, so a neighbour's snapshot within the reuse radius counts
+        fresh_snapshot = fresh_snapshots_for_points({location_key: (plant.latitude, plant.longitude)}).get(location_key)
+        snapshot = fresh_snapshot or (
             WeatherSnapshot.objects.filter(location_key=location_key)
             .order_by("-forecast_at")
             .first()
         )
 
     evaluation_warning = None
-    if snapshot and snapshot.expires_at >= timezone.now():
+    if fresh_snapshot:
         try:
-            apply_weather_to_plant_reminders(plant, snapshot)
+            apply_weather_to_plant_reminders(plant, fresh_snapshot)
         except Exception as exc:
             evaluation_warning = str(exc)
 
@@ -95,47 +111,25 @@ def get_forecast(request):
             except (TypeError, ValueError):
                 return Response({"detail": "Invalid latitude/longitude"}, status=400)
 
-            forecast_data = WeatherAPIClient.fetch_forecast_summary(
-                latitude,
-                longitude,
-                timezone_name,
-            )
             resolved_location = location_label or "Current Location"
             resolved_timezone = timezone_name
         else:
             coords = WeatherAPIClient.geocode_location(location)
             if not coords:
                 return Response({"detail": "Location not found"}, status=404)
-        
-            forecast_data = WeatherAPIClient.fetch_forecast_summary(
-                coords.latitude,
-                coords.longitude,
-                coords.timezone,
-            )
+
             latitude = coords.latitude
             longitude = coords.longitude
+            timezone_name = coords.timezone
             resolved_location = location
             resolved_timezone = coords.timezone
-        
-        # Parse daily data for 3 days
-        payload = forecast_data.get("payload", {})
-        daily = payload.get("daily", {})
-        dates = daily.get("time", [])
-        tmax = daily.get("temperature_2m_max", [])
-        tmin = daily.get("temperature_2m_min", [])
-        rain_sum = daily.get("precipitation_sum", [])
-        rain_prob = daily.get("precipitation_probability_max", [])
-        
-        days = []
-        for i in range(min(3, len(dates))):
-            days.append({
-                "date": dates[i] if i < len(dates) else None,
-                "temp_max": tmax[i] if i < len(tmax) else None,
-                "temp_min": tmin[i] if i < len(tmin) else None,
-                "precipitation_sum": rain_sum[i] if i < len(rain_sum) else 0,
-                "precipitation_probability": rain_prob[i] if i < len(rain_prob) else 0,
-            })
-        
+
+        location_key = build_location_key(latitude, longitude)
+        touch_location_cell(location_key, latitude, longitude, timezone_name)
+        snapshot, fetched = fetch_or_reuse_snapshot(location_key, latitude, longitude, timezone_name)
+        record_forecast_lookup(hit=not fetched)
+        days = forecast_days_from_payload(snapshot.payload)
+
         return Response({
             "location": resolved_location,
             "latitude": latitude,
@@ -146,3 +140,39 @@ def get_forecast(request):
     
     except Exception as e:
         return Response({"detail": str(e)}, status=500)
+
+
+def counters_unavailable_response() -> Response:
+    return Response(
+        {"detail": "Hourly counters need a shared cache; set CACHE_REDIS_URL so web and Celery processes count in one place."},
+        status=503,
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def forecast_cache_stats(request):
+    if not hourly_counters_available():
+        return counters_unavailable_response()
+    try:
+        hours = int(request.GET.get("hours", 24))
+    except (TypeError, ValueError):
+        return Response({"detail": "Invalid hours"}, status=400)
+    hours = max(1, min(hours, HOURLY_COUNTER_RETENTION_HOURS))
+
+    stats = forecast_lookup_stats(hours)
+    stats["active_cells"] = len(active_location_cells())
+    return Response(stats)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdmin])
+def smart_evaluation_metrics(request):
+    if not hourly_counters_available():
+        return counters_unavailable_response()
+    try:
+        hours = int(request.GET.get("hours", 24))
+    except (TypeError, ValueError):
+        return Response({"detail": "Invalid hours"}, status=400)
+    hours = max(1, min(hours, HOURLY_COUNTER_RETENTION_HOURS))
+    return Response(smart_evaluation_stats(hours))
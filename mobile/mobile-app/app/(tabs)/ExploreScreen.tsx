@@ -156,7 +156,7 @@ export default function ExploreScreen() {
 
   const loadUnread = async () => {
     try {
-      const res = await fetchWithAuth("http://10.0.2.2:8000/api/notifications/", {
+      const res = await fetchWithAuth("http://10.0.2.2:8000/api/notifications/unread-count/", {
         headers: { Accept: "application/json" },
       });
 
@@ -164,8 +164,7 @@ export default function ExploreScreen() {
       if (!res.ok) throw new Error(raw);
 
       const data = JSON.parse(raw);
-      const unread = Array.isArray(data) ? data.filter((n: any) => !n.is_read).length : 0;
-      setUnreadCount(unread);
+      setUnreadCount(typeof data?.unread === "number" ? data.unread : 0);
     } catch {
       setUnreadCount(0);
     }
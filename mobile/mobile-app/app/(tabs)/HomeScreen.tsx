@@ -143,7 +143,7 @@ export default function HomeScreen() {
       const token = await AsyncStorage.getItem("access");
       if (!token) return;
 
-      const res = await fetch("http://10.0.2.2:8000/api/notifications/", {
+      const res = await fetch("http://10.0.2.2:8000/api/notifications/unread-count/", {
         headers: { Authorization: `Bearer ${token}`, Accept: "application/json" },
       });
 
@@ -153,8 +153,7 @@ export default function HomeScreen() {
       }
 
       const data = await res.json();
-      const unread = Array.isArray(data) ? data.filter((n: any) => !n.is_read).length : 0;
-      setUnreadCount(unread);
+      setUnreadCount(typeof data?.unread === "number" ? data.unread : 0);
     } catch {
       setUnreadCount(0);
     }
@@ -16,7 +16,7 @@ import { useFocusEffect } from "@react-navigation/native";
 import { useTranslation } from "react-i18next";
 
 type Notif = {
-  id: number;
+  id: number | string;
   type: string;
   title: string;
   body: string;
@@ -30,6 +30,9 @@ export default function NotificationsScreen() {
   const [loading, setLoading] = useState(true);
   const [items, setItems] = useState<Notif[]>([]);
   const [busy, setBusy] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [unread, setUnread] = useState(0);
 
   async function fetchWithAuth(url: string, options: any = {}) {
     let access = await AsyncStorage.getItem("access");
@@ -63,6 +66,16 @@ export default function NotificationsScreen() {
     return res;
   }
 
+  const loadUnread = async () => {
+    try {
+      const res = await fetchWithAuth("http://10.0.2.2:8000/api/notifications/unread-count/", {
+        headers: { Accept: "application/json" },
+      });
+      const data = await res.json();
+      setUnread(typeof data?.unread === "number" ? data.unread : 0);
+    } catch {}
+  };
+
   const load = async () => {
     try {
       setLoading(true);
@@ -72,11 +85,33 @@ export default function NotificationsScreen() {
 
       const data = await res.json();
       setItems(Array.isArray(data) ? data : []);
+      setNextCursor(res.headers.get("X-Next-Cursor"));
     } catch {
       setItems([]);
+      setNextCursor(null);
     } finally {
       setLoading(false);
     }
+    loadUnread();
+  };
+
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const res = await fetchWithAuth(
+        `http://10.0.2.2:8000/api/notifications/?cursor=${encodeURIComponent(nextCursor)}`,
+        { headers: { Accept: "application/json" } }
+      );
+      if (!res.ok) return;
+
+      const data = await res.json();
+      if (Array.isArray(data)) setItems((prev) => [...prev, ...data]);
+      setNextCursor(res.headers.get("X-Next-Cursor"));
+    } catch {
+    } finally {
+      setLoadingMore(false);
+    }
   };
 
   useEffect(() => {
@@ -89,12 +124,13 @@ export default function NotificationsScreen() {
     }, [])
   );
 
-  const markOne = async (id: number) => {
+  const markOne = async (item: Notif) => {
     try {
-      await fetchWithAuth(`http://10.0.2.2:8000/api/notifications/${id}/read/`, {
+      await fetchWithAuth(`http://10.0.2.2:8000/api/notifications/${item.id}/read/`, {
         method: "POST",
       });
-      setItems((prev) => prev.map((n) => (n.id === id ? { ...n, is_read: true } : n)));
+      setItems((prev) => prev.map((n) => (n.id === item.id ? { ...n, is_read: true } : n)));
+      if (!item.is_read) setUnread((prev) => Math.max(0, prev - 1));
     } catch {}
   };
 
@@ -103,6 +139,7 @@ export default function NotificationsScreen() {
       setBusy(true);
       await fetchWithAuth("http://10.0.2.2:8000/api/notifications/read-all/", { method: "POST" });
       setItems((prev) => prev.map((n) => ({ ...n, is_read: true })));
+      setUnread(0);
     } finally {
       setBusy(false);
     }
@@ -117,8 +154,6 @@ export default function NotificationsScreen() {
     );
   }
 
-  const unread = items.filter((n) => !n.is_read).length;
-
   return (
     <LinearGradient colors={["#f9faf9", "#e8f0eb", "#dae7df"]} style={{ flex: 1 }}>
       <SafeAreaView style={styles.safe} edges={["top", "left", "right"]}>
@@ -146,6 +181,11 @@ export default function NotificationsScreen() {
             keyExtractor={(item) => String(item.id)}
             showsVerticalScrollIndicator={false}
             contentContainerStyle={{ paddingTop: 14, paddingBottom: 22 }}
+            onEndReached={loadMore}
+            onEndReachedThreshold={0.5}
+            ListFooterComponent={
+              loadingMore ? <ActivityIndicator style={{ marginTop: 12 }} color="#2d6a4f" /> : null
+            }
             ListEmptyComponent={
               <View style={styles.empty}>
                 <Feather name="bell-off" size={22} color="#3e7c52" />
@@ -155,7 +195,7 @@ export default function NotificationsScreen() {
             }
             renderItem={({ item }) => (
               <Pressable
-                onPress={() => markOne(item.id)}
+                onPress={() => markOne(item)}
                 style={[styles.card, !item.is_read && styles.cardUnread]}
               >
                 <View style={styles.cardLeft}>